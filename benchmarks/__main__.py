@@ -0,0 +1,231 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Minimal runner for the asv-style benchmarks in this directory
+
+The benchmark classes follow the conventions of airspeed velocity
+(asv), so they can be run with `asv run` using "asv.conf.json" at
+the top of the repository.  This runner provides the same
+measurements without asv, stores baselines as JSON files, and
+compares new results against a stored baseline.  `time_*` benchmarks
+report the best wall time; `track_*` benchmarks report the value they
+return, e.g., a memory growth, where lower is also better:
+
+    python -m benchmarks run     [-k PATTERN] [-o FILE]
+    python -m benchmarks compare [-k PATTERN] [-b FILE] [-t THRESHOLD]
+
+`compare` uses the baseline of the current machine,
+"baselines/<machine>.json", if `run` has stored one, and otherwise
+the reference baseline "baselines/reference.json" that is committed
+with the repository.  Every baseline records the time of a fixed
+calibration workload, and the stored times are scaled by the ratio
+of the calibration times before comparing, so the reference can be
+used on machines faster or slower than the one that recorded it.
+After a change that is meant to alter the performance, regenerate
+the reference with
+
+    python -m benchmarks run -o benchmarks/baselines/reference.json
+
+and commit it together with the change.
+
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+
+import sys
+import json
+import platform
+import argparse
+import importlib
+import itertools
+
+from glob      import glob
+from os        import makedirs
+from os.path   import basename, dirname, abspath, join, splitext, exists
+from timeit    import default_timer as timer
+
+
+BASELINES = join(dirname(abspath(__file__)), "baselines")
+REFERENCE = join(BASELINES, "reference.json")
+
+
+def default_baseline():
+    """Path of the stored baseline of the current machine"""
+    return join(BASELINES, platform.node() + ".json")
+
+
+def calibrate(repeat=5):
+    """Best time of a fixed numpy workload to scale baselines by"""
+    import numpy as np
+    a    = np.random.RandomState(0).rand(1 << 20)
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = timer()
+        np.sort(a)
+        np.cumsum(np.sqrt(a) * a)
+        best = min(best, timer() - t0)
+    return best
+
+
+def discover(pattern=None):
+    """Generate `(name, cls, method, params)` for every benchmark"""
+    for f in sorted(glob(join(dirname(abspath(__file__)), "bench_*.py"))):
+        mod = importlib.import_module("benchmarks." + splitext(basename(f))[0])
+        for cname, cls in sorted(vars(mod).items()):
+            if not isinstance(cls, type) or cls.__module__ != mod.__name__:
+                continue
+            params = getattr(cls, 'params', [])
+            if params and not isinstance(params[0], (list, tuple)):
+                params = [params] # a single parameter
+            for mname in sorted(vars(cls)):
+                if not mname.startswith(('time_', 'track_')):
+                    continue
+                for p in itertools.product(*params):
+                    name = "{}.{}.{}({})".format(
+                        mod.__name__.split('.')[-1], cname, mname,
+                        ", ".join(repr(v) for v in p))
+                    if pattern is None or pattern in name:
+                        yield name, cls, mname, p
+
+
+def measure(cls, mname, params, repeat=3):
+    """Return the best of `repeat` timings or tracked values"""
+    best = float('inf')
+    for _ in range(1 if mname.startswith('track_') else repeat):
+        bench = cls()
+        if hasattr(bench, 'setup'):
+            bench.setup(*params)
+        try:
+            t0 = timer()
+            value = getattr(bench, mname)(*params)
+            if mname.startswith('time_'):
+                value = timer() - t0
+            best = min(best, value)
+        finally:
+            if hasattr(bench, 'teardown'):
+                bench.teardown(*params)
+    return best
+
+
+def run(pattern=None, repeat=3):
+    """Run all matching benchmarks and return the results"""
+    cal     = calibrate() # before the benchmarks load the process
+    results = {}
+    for name, cls, mname, params in discover(pattern):
+        results[name] = measure(cls, mname, params, repeat=repeat)
+        unit = getattr(getattr(cls, mname), 'unit', "s")
+        print("{:12.6f} {:7} {}".format(results[name], unit, name))
+        sys.stdout.flush()
+    return {'machine':     platform.node(),
+            'python':      platform.python_version(),
+            'calibration': cal,
+            'results':     results}
+
+
+def rescale(old, new):
+    """Scale the times of baseline `old` to the machine of `new`"""
+    if not old.get('calibration') or not new.get('calibration'):
+        return old['results']
+    s = new['calibration'] / old['calibration']
+    return dict((name, value * s if '.time_' in name else value)
+                for name, value in old['results'].items())
+
+
+def compare(new, old, threshold=1.2):
+    """Compare two sets of results; return the names of regressions"""
+    slower = []
+    for name in sorted(new):
+        if name not in old:
+            continue
+        if new[name] <= 0 and old[name] <= 0:
+            ratio = 1.0
+        elif old[name] > 0:
+            ratio = new[name] / old[name]
+        else:
+            ratio = float('inf')
+        flag  = ""
+        if ratio > threshold:
+            flag = "SLOWER"
+            slower.append(name)
+        elif ratio < 1 / threshold:
+            flag = "faster"
+        print("{:12.6f} {:12.6f} {:8.2f}x {:6}  {}".format(
+            old[name], new[name], ratio, flag, name))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument('command', choices=['run', 'compare'])
+    parser.add_argument('-k', '--pattern', default=None,
+                        help="only run benchmarks whose names contain PATTERN")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="number of repeats; the best time is kept")
+    parser.add_argument('-o', '--output', default=None,
+                        help="store the results as a baseline "
+                             "(default: benchmarks/baselines/<machine>.json)")
+    parser.add_argument('-b', '--baseline', default=None,
+                        help="baseline to compare against (default: "
+                             "benchmarks/baselines/<machine>.json if it "
+                             "exists, else the committed reference.json)")
+    parser.add_argument('-t', '--threshold', type=float, default=1.2,
+                        help="flag benchmarks slower than THRESHOLD times "
+                             "the baseline")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        baseline = args.baseline or default_baseline()
+        if args.baseline is None and not exists(baseline):
+            baseline = REFERENCE
+        if not exists(baseline):
+            parser.error("baseline \"{}\" does not exist; create it with "
+                         "`python -m benchmarks run`".format(baseline))
+        with open(baseline) as f:
+            old = json.load(f)
+        print("Comparing against \"{}\"".format(baseline))
+
+    new = run(args.pattern, repeat=args.repeat)
+
+    if args.command == 'run':
+        output = args.output or default_baseline()
+        if dirname(output) and not exists(dirname(output)):
+            makedirs(dirname(output))
+        if exists(output): # keep the results of unselected benchmarks
+            with open(output) as f:
+                old = json.load(f)
+            old = rescale(old, new)
+            old.update(new['results'])
+            new['results'] = old
+        with open(output, 'w') as f:
+            json.dump(new, f, indent=2, sort_keys=True)
+        print("Baseline stored in \"{}\"".format(output))
+        return 0
+
+    print()
+    slower = compare(new['results'], rescale(old, new),
+                     threshold=args.threshold)
+    if slower:
+        print("\n{} benchmark(s) slower than {}x the baseline".format(
+            len(slower), args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
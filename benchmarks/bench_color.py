@@ -0,0 +1,79 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+
+import numpy as np
+
+from ehtplot.color.cmath import max_chroma
+from ehtplot.color.cmap  import ehtuniform
+from ehtplot.color.ctab  import list_ctab, load_ctab
+from ehtplot.color.core  import register, unmodified
+
+try:
+    from matplotlib import colormaps
+except ImportError:
+    colormaps = None # old matplotlib silently re-registers colormaps
+
+
+class TimeMaxChroma(object):
+    """Bisection for the maximum chroma of color tables"""
+    params      = [64, 256, 1024, 4096]
+    param_names = ['N']
+
+    def setup(self, N):
+        self.Jp = np.linspace(6.25, 93.75, N)
+        self.hp = np.linspace(0.0, 2.0 * np.pi, N)
+
+    def time_max_chroma(self, N):
+        max_chroma(self.Jp, self.hp)
+
+
+class TimeEhtuniform(object):
+    """Construction of perceptually uniform colormaps"""
+    params      = [64, 256]
+    param_names = ['N']
+    timeout     = 300
+
+    def time_ehtuniform(self, N):
+        ehtuniform(N=N)
+
+
+class TimeCtab(object):
+    """Loading and registering the bundled color tables"""
+    params      = [1, 16, 'all']
+    param_names = ['tables']
+
+    def setup(self, tables):
+        names = sorted(list_ctab())
+        self.names = names if tables == 'all' else names[:tables]
+
+        # Newer matplotlib refuses to register an existing name
+        if colormaps is not None:
+            for name in self.names:
+                for n in [name, name + ("_r" if unmodified(name) else "r")]:
+                    if n in colormaps:
+                        colormaps.unregister(n)
+
+    def time_load_ctab(self, tables):
+        for name in self.names:
+            load_ctab(name)
+
+    def time_register(self, tables):
+        for name in self.names:
+            register(name=name)
@@ -0,0 +1,52 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+
+import shutil
+import tempfile
+from os.path import join
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import ehtplot as eht
+
+from benchmarks.common import sample
+
+
+class TimeSave(object):
+    """Drawing and exporting complete figures"""
+    params      = ([1, 3, 9], ['ehtplot', 'ggplot'], ['.png', '.png+.jpg', '.pdf'])
+    param_names = ['panels', 'style', 'formats']
+    timeout     = 300
+
+    def setup(self, panels, style, formats):
+        img = sample()
+        self.fig   = eht.plot('image', [img] * panels)
+        self.dir   = tempfile.mkdtemp()
+        self.files = [join(self.dir, "bench" + ext)
+                      for ext in formats.replace('+', ' ').split()]
+
+    def teardown(self, panels, style, formats):
+        plt.close('all')
+        shutil.rmtree(self.dir)
+
+    def time_save(self, panels, style, formats):
+        self.fig.save(self.files, style=style)
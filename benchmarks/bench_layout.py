@@ -0,0 +1,78 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import ehtplot as eht
+from ehtplot.layouts import divide, grid
+
+
+_shapes = {10: (2, 5), 100: (10, 10), 2500: (50, 50)}
+
+
+class TimeLayout(object):
+    """Layout and rendering cost of panel grids"""
+    params      = ([10, 100, 2500], ['nested', 'grid', 'mosaic'])
+    param_names = ['panels', 'layout']
+    timeout     = 600
+
+    def setup(self, panels, layout):
+        n, m = _shapes[panels]
+        img  = np.random.rand(16, 16)
+        if layout == 'mosaic': # one Axes with the ticks of 'grid'
+            self.fig = eht.plot('image', [[img] * m] * n, colorbar=False,
+                                layout='grid', mosaic={'ticks': True})
+        else:
+            self.fig = eht.plot('image', [[img] * m] * n,
+                                colorbar=False, layout=layout,
+                                ticklabels='outer' if layout == 'grid'
+                                else 'all')
+
+    def teardown(self, panels, layout):
+        plt.close('all')
+
+    def time_draw(self, panels, layout):
+        self.fig.draw()
+
+    def time_render(self, panels, layout):
+        self.fig.draw().canvas.draw()
+
+
+class TimeBoxes(object):
+    """Cost of computing the cell boxes alone"""
+    params      = [10, 100, 2500]
+    param_names = ['panels']
+
+    def setup(self, panels):
+        self.pos = matplotlib.transforms.Bbox([[0, 0], [1, 1]])
+
+    def time_divide(self, panels):
+        n, m = _shapes[panels]
+        for b in divide(self.pos, n, inrow=False):
+            pos = matplotlib.transforms.Bbox.from_bounds(*b)
+            list(divide(pos, m))
+
+    def time_grid(self, panels):
+        n, m = _shapes[panels]
+        grid(self.pos, n, m)
+
@@ -0,0 +1,56 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from ehtplot.visual import Visual
+
+from benchmarks.common import sample
+
+
+class TimeLoadVisual(object):
+    """Dynamic loading of visualizing functions"""
+    params      = ['image', 'cmap', 'colors']
+    param_names = ['visual']
+
+    def time_load_from_file(self, visual):
+        Visual._load_from_file(visual)
+
+
+class TimeImage(object):
+    """Realizing an image visual on a single axes"""
+    params      = ([64, 512, 2048], [True, False])
+    param_names = ['size', 'zoom']
+
+    def setup(self, size, zoom):
+        self.img    = sample(size=size)
+        self.visual = Visual('image', zoom=zoom)
+        self.fig    = plt.figure()
+
+    def teardown(self, size, zoom):
+        plt.close(self.fig)
+
+    def time_draw(self, size, zoom):
+        ax = self.fig.add_axes([0, 0, 1, 1])
+        self.visual.draw(ax, self.img.copy())
+        self.fig.canvas.draw()
+        self.fig.clear()
@@ -0,0 +1,50 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+
+import os
+import sys
+from os.path import abspath, dirname, join
+
+import numpy as np
+
+from ehtplot.extra import io
+
+
+SAMPLE = join(dirname(dirname(abspath(__file__))), "examples", "sample")
+
+
+def sample(component="pca0", size=None):
+    """Load the bundled sample image, optionally upsampled to `size`"""
+    img = io.open(SAMPLE, component=component)
+    if size is not None and size != img.shape[0]:
+        f   = max(size // img.shape[0], 1)
+        img = np.kron(img, np.ones((f, f)))[:size,:size]
+    return img
+
+
+def rss():
+    """Current resident memory of the process in bytes"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError): # not Linux; use the peak instead
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
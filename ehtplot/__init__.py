@@ -26,6 +26,7 @@ from ehtplot.theme  import *
 from ehtplot.panel  import *
 from ehtplot.figure import *
 from ehtplot.visual import *
+from ehtplot.stack  import *
 
 # ehtplot API
 from ehtplot.api    import *
@@ -18,10 +18,15 @@
 
 from __future__ import absolute_import
 
+import numpy as np
+from matplotlib.transforms import Bbox
+
 from ehtplot.visual  import Visual
 from ehtplot.panel   import Panel
 from ehtplot.figure  import Figure
-from ehtplot.helpers import ensure_list, split_tuple, split_dict
+from ehtplot.stack   import Stack
+from ehtplot.helpers import ensure_list, split_tuple, split_dict, merge_dict
+from ehtplot.layouts import grid
 
 
 def _getbce(obj, i):
@@ -110,7 +115,92 @@ def panel(*args, **kwargs):
     return p
 
 
+def _same(a, b):
+    """Check if two keyworded argument values are the same"""
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    return a == b
+
+
+def _mosaic(pnl, opts):
+    """Turn a uniform grid of image visuals into a single mosaic visual"""
+    if pnl._isgrid(merge_dict(pnl.kwprops, {'layout': 'grid'})):
+        n, m  = len(pnl.panels), len(pnl.panels[0].panels)
+        sub   = pnl.panels[0].kwprops['inrow']
+        cells = [c for r in pnl.panels for c in r.panels]
+    else:
+        n, m, sub = len(pnl.panels), 1, True
+        cells     = pnl.panels
+
+    visuals = [c.panels[0] if isinstance(c, Panel) and len(c.panels) == 1
+               else c for c in cells]
+    if not all(isinstance(v, Visual) and
+               v.visual.__name__ == 'visualize_image' and
+               len(v.props) == 1 for v in visuals):
+        raise ValueError("mosaic requires every cell to be a single image")
+
+    keys = ('imgsz', 'pxsz', 'zoom', 'norm', 'scale', 'vlim', 'colorbar')
+    kw   = dict((k, v) for k, v in visuals[0].kwprops.items() if k in keys)
+    if not all(set(k for k in v.kwprops if k in keys) == set(kw) and
+               all(_same(v.kwprops[k], kw[k]) for k in kw) for v in visuals):
+        raise ValueError("mosaic requires every image to share the same "
+                         "colormap and normalization")
+
+    # Recover the row and column of each cell from its layout box
+    boxes = grid(Bbox([[0, 0], [1, 1]]), n, m,
+                 inrow=pnl.kwprops['inrow'], subinrow=sub)
+    cols  = np.rint(boxes[:,0] / boxes[:,2]).astype(int)
+    rows  = np.rint(boxes[:,1] / boxes[:,3]).astype(int)
+
+    imgs  = [[None] * (cols.max()+1) for _ in range(rows.max()+1)]
+    names = [[None] * (cols.max()+1) for _ in range(rows.max()+1)]
+    for v, i, j in zip(visuals, rows, cols):
+        imgs [i][j] = v.props[0]
+        names[i][j] = v.kwprops.get('name')
+
+    kw = merge_dict(kw, opts if isinstance(opts, dict) else {})
+    return Panel([Visual('mosaic', imgs, names=names, **kw)])
+
+
+def _unstack(args, kwargs):
+    """Expand a Stack argument into its frames and shared normalization"""
+    stacks = [i for i, a in enumerate(args) if isinstance(a, Stack)]
+    if not stacks:
+        return args, kwargs
+    if len(stacks) > 1:
+        raise ValueError("only one Stack can be plotted at a time")
+
+    i     = stacks[0]
+    stack = args[i]
+    kw    = stack.kwargs(norm=kwargs.get('norm', 1),
+                         scale=kwargs.get('scale', 'lin'))
+    if 'vlim' in kwargs:
+        kw.pop('vlim')
+    return (args[:i] + (stack.frames(),) + args[i+1:],
+            merge_dict(kwargs, kw))
+
+
 def plot(*args, **kwargs):
-    """Smart plot generation "frontend" of `ehtplot`"""
+    """Smart plot generation "frontend" of `ehtplot`
+
+    Passing `mosaic=True` (or a dictionary of options for the
+    "mosaic" visual, e.g., `mosaic={'gutter': 4}`) renders a grid of
+    image visuals that share the same colormap and normalization as
+    a single composited image instead of one axes per image.  With
+    `mosaic={'ticks': True}`, the mosaic keeps the axes, ticks, and
+    labels of a `layout='grid'`, `ticklabels='outer'` grid, drawn
+    once on the single axes.
+
+    An `ehtplot.Stack` argument is expanded into its selected frames,
+    which are drawn with the normalization and color limits computed
+    from the whole stack.
+
+    """
     kwargs, kwprops = split_dict(kwargs, Figure._prop_keys)
-    return Figure(panel(*args, **kwargs), **kwprops)
+    mosaic = kwargs.pop('mosaic', False)
+    args, kwargs = _unstack(args, kwargs)
+
+    pnl = panel(*args, **kwargs)
+    if mosaic:
+        pnl = _mosaic(pnl, mosaic)
+    return Figure(pnl, **kwprops)
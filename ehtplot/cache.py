@@ -0,0 +1,380 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Content-hash render cache for Figure.save()"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import inspect
+import threading
+
+from functools import lru_cache
+from os.path   import join, exists, expanduser, dirname, relpath
+from time      import time
+
+import numpy      as np
+import matplotlib as mpl
+
+from ehtplot.panel   import Panel
+from ehtplot.visual  import Visual
+from ehtplot.store   import digest
+from ehtplot.helpers import split_dict, merge_dict
+from ehtplot.rc      import style_rc
+
+
+_dist = 'pyehtplot' # distribution name in setup.py
+
+
+def _version():
+    """Installed version of ehtplot, or None"""
+    try:
+        from importlib.metadata import version
+        return version(_dist)
+    except Exception: # not installed, or python < 3.8
+        return None
+
+
+@lru_cache(maxsize=1)
+def _digest():
+    """Digest of the python sources of the ehtplot package
+
+    Source checkouts and editable installs keep the same version
+    while the code changes, so the sources are hashed as well.
+
+    """
+    root = dirname(os.path.abspath(__file__))
+    h    = hashlib.blake2b(digest_size=16)
+    for d, dirs, files in os.walk(root):
+        dirs.sort()
+        for f in sorted(files):
+            if f.endswith('.py'):
+                h.update(relpath(join(d, f), root).encode())
+                with open(join(d, f), 'rb') as src:
+                    h.update(src.read())
+    return h.hexdigest()
+
+
+def _versions():
+    """Versions of ehtplot and the libraries that affect rendering"""
+    return (_version(), _digest(), mpl.__version__, np.__version__)
+
+
+def _source(func):
+    """Digest of the source file of a visualizing function"""
+    try:
+        with open(inspect.getsourcefile(func), 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except (TypeError, IOError, OSError):
+        return None
+
+
+class _Uncacheable(Exception):
+    """Raised for objects without a deterministic fingerprint"""
+
+
+def _code(h, co):
+    """Feed the bytecode, constants, and names of a code object"""
+    h.update(b"c" + co.co_code)
+    h.update(repr((co.co_names, co.co_varnames, co.co_freevars)).encode())
+    for c in co.co_consts:
+        if inspect.iscode(c): # nested functions, lambdas, comprehensions
+            _code(h, c)
+        else:
+            _update(h, c)
+
+
+def _function(h, func, seen):
+    """Feed a fingerprint of a python function and what it closes over
+
+    Closures and lambdas defined in the same file share their module,
+    name, and source digest, so the code, defaults, and the contents
+    of the closure cells are hashed as well.
+
+    """
+    if id(func) in seen: # recursive closure
+        h.update(b"R")
+        return
+    seen = seen | {id(func)}
+    h.update("f{}.{}:{}".format(func.__module__, func.__qualname__,
+                                _source(func)).encode())
+    _code(h, func.__code__)
+    _update(h, func.__defaults__, seen)
+    _update(h, func.__kwdefaults__, seen)
+    for cell in func.__closure__ or ():
+        try:
+            _update(h, cell.cell_contents, seen)
+        except ValueError: # empty cell
+            h.update(b"e")
+
+
+def _update(h, obj, seen=frozenset()):
+    """Feed a deterministic fingerprint of `obj` into hash `h`
+
+    Raises:
+        _Uncacheable: If `obj` has no deterministic fingerprint.
+
+    """
+    if isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+        h.update(b"a" + digest(obj).encode())
+    elif isinstance(obj, (list, tuple)):
+        h.update("{}{}".format(type(obj).__name__, len(obj)).encode())
+        for o in obj:
+            _update(h, o, seen)
+    elif isinstance(obj, dict):
+        h.update("d{}".format(len(obj)).encode())
+        for k in sorted(obj, key=repr):
+            _update(h, k, seen)
+            _update(h, obj[k], seen)
+    elif isinstance(obj, Panel):
+        h.update(b"P")
+        _update(h, obj.kwprops, seen)
+        _update(h, obj.panels, seen)
+    elif isinstance(obj, Visual):
+        h.update(b"V")
+        _update(h, obj.visual, seen)
+        _update(h, obj.props, seen)
+        _update(h, obj.kwprops, seen)
+    elif inspect.ismethod(obj):
+        h.update(b"m")
+        _update(h, obj.__self__, seen)
+        _update(h, obj.__func__, seen)
+    elif inspect.isfunction(obj):
+        _function(h, obj, seen)
+    elif callable(obj) and hasattr(obj, '__qualname__'):
+        # builtins and classes are identified by their names
+        h.update("b{}.{}".format(getattr(obj, '__module__', None),
+                                 obj.__qualname__).encode())
+    else:
+        try:
+            h.update(b"p" + pickle.dumps(obj, protocol=4))
+        except Exception:
+            r = repr(obj)
+            if " at 0x" in r: # default repr; only unique while alive
+                raise _Uncacheable(r)
+            h.update(b"r" + r.encode())
+
+
+def fingerprint(*objs, size=8):
+    """Deterministic hex digest of `objs`, or None if there is none
+
+    Unlike hash() or repr(), the digest is stable across processes
+    for arrays, containers, and functions, including lambdas and
+    closures.
+
+    """
+    h = hashlib.blake2b(digest_size=size)
+    try:
+        _update(h, objs)
+    except _Uncacheable:
+        return None
+    return h.hexdigest()
+
+
+class RenderCache(object):
+    """Size-bounded cache of rendered output files
+
+    Figure.save(files, cache=RenderCache()) computes a content hash of
+    the Figure: the tree of Panels and Visuals (visual names, the
+    source, code, defaults, and closures of their visualizing
+    functions, arguments with digests of the arrays, and properties),
+    the rc parameters of the style and of the session, the version
+    and a source digest of ehtplot, and the versions of matplotlib
+    and numpy.  For each output whose hash, format, and dpi are found
+    in the cache, the cached file is linked or copied to the
+    requested name; only the missing outputs are rendered and then
+    added to the cache.  Figures holding objects that cannot be
+    fingerprinted, e.g., unpicklable callable objects, are never
+    cached.
+
+    When the total size exceeds `max_bytes`, the least recently used
+    entries are evicted.  The index is stored as JSON in the cache
+    directory and is replaced atomically, so several processes can
+    share a cache; concurrent updates may lose entries but never
+    corrupt them.
+
+    Attributes:
+        dir (string): The cache directory.
+        max_bytes (int): Maximum total size of the cached files.
+        link (bool): Hard link cached files to the outputs instead of
+            copying them.  Outputs must then not be modified in place.
+        hits (int): Number of outputs served from the cache.
+        misses (int): Number of outputs that had to be rendered.
+
+    """
+    def __init__(self, dir=None, max_bytes=1<<30, link=False):
+        """RenderCache initializer
+
+        Args:
+            dir (string): The cache directory; defaults to
+                $EHTPLOT_CACHE or ~/.cache/ehtplot/renders.
+            max_bytes (int): Maximum total size of the cached files.
+            link (bool): Hard link instead of copy cached outputs.
+
+        """
+        if dir is None:
+            dir = os.environ.get('EHTPLOT_CACHE',
+                                 join(expanduser("~"), ".cache",
+                                      "ehtplot", "renders"))
+        if not exists(dir):
+            os.makedirs(dir)
+        self.dir       = dir
+        self.max_bytes = max_bytes
+        self.link      = link
+        self.hits      = 0
+        self.misses    = 0
+        self._lock     = threading.Lock()
+
+
+    def key(self, fig, args=(), kwargs={}):
+        """Content hash of drawing `fig` with `args` and `kwargs`
+
+        Returns None if the Figure holds an object without a
+        deterministic fingerprint, e.g., an unpicklable callable
+        object; such Figures are always rendered.
+
+        """
+        kwargs, kwprops = split_dict(kwargs, fig._prop_keys)
+        kwprops = merge_dict(fig.kwprops, kwprops)
+
+        h = hashlib.blake2b(digest_size=20)
+        try:
+            _update(h, _versions())
+            _update(h, dict(mpl.rcParams)) # savefig.* apply outside the style
+            _update(h, style_rc(kwprops['style']))
+            _update(h, kwprops)
+            _update(h, fig.panel)
+            _update(h, args)
+            _update(h, kwargs)
+        except _Uncacheable:
+            return None
+        return h.hexdigest()
+
+
+    def _name(self, key, file):
+        """Name of the cache entry of output `file`"""
+        file, dpi = file if isinstance(file, tuple) else (file, None)
+        ext = os.path.splitext(file)[1].lower()
+        sub = hashlib.blake2b("{}{!r}".format(ext, dpi).encode(),
+                              digest_size=4).hexdigest()
+        return "{}-{}{}".format(key, sub, ext)
+
+
+    def _index(self):
+        try:
+            with open(join(self.dir, "index.json")) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+
+    def _write(self, index):
+        tmp = join(self.dir, "index.json.{}.tmp".format(os.getpid()))
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, join(self.dir, "index.json"))
+
+
+    def get(self, key, file):
+        """Link or copy the cached output to `file`; return True on a hit"""
+        dst = file[0] if isinstance(file, tuple) else file
+        if key is None or not isinstance(dst, str): # never cached
+            self.misses += 1
+            return False
+        name = self._name(key, file)
+        path = join(self.dir, name)
+        with self._lock:
+            index = self._index()
+            if name not in index or not exists(path):
+                self.misses += 1
+                return False
+            if exists(dst):
+                os.remove(dst)
+            try:
+                if not self.link:
+                    raise OSError
+                os.link(path, dst)
+            except OSError: # not linking, or across file systems
+                shutil.copyfile(path, dst)
+            index[name]['atime'] = time()
+            self._write(index)
+            self.hits += 1
+            return True
+
+
+    def put(self, key, file):
+        """Add the rendered output `file` to the cache"""
+        src = file[0] if isinstance(file, tuple) else file
+        if key is None or not isinstance(src, str) or not exists(src):
+            return
+        name = self._name(key, file)
+        with self._lock:
+            tmp = join(self.dir, name + ".tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, join(self.dir, name))
+            index = self._index()
+            index[name] = {'size': os.path.getsize(join(self.dir, name)),
+                           'atime': time()}
+            self._evict(index)
+            self._write(index)
+
+
+    def _evict(self, index):
+        """Remove least recently used entries until the cache fits"""
+        total = sum(e['size'] for e in index.values())
+        for name in sorted(index, key=lambda n: index[n]['atime']):
+            if total <= self.max_bytes:
+                break
+            total -= index.pop(name)['size']
+            try:
+                os.remove(join(self.dir, name))
+            except OSError:
+                pass
+
+
+    @property
+    def hit_rate(self):
+        """Fraction of outputs served from the cache"""
+        n = self.hits + self.misses
+        return self.hits / n if n else 0.0
+
+
+    def report(self):
+        """Return a one-line summary of the cache usage"""
+        index = self._index()
+        return ("{} hits, {} misses, hit rate {:.1%}; "
+                "{} entries, {:.1f} MiB of {:.1f} MiB").format(
+                    self.hits, self.misses, self.hit_rate, len(index),
+                    sum(e['size'] for e in index.values()) / 2**20,
+                    self.max_bytes / 2**20)
+
+
+    def clear(self):
+        """Remove all cached outputs"""
+        with self._lock:
+            for name in self._index():
+                try:
+                    os.remove(join(self.dir, name))
+                except OSError:
+                    pass
+            self._write({})
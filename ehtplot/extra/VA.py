@@ -16,12 +16,21 @@
 # You should have received a copy of the GNU General Public License
 # along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
 
+import numpy as np
+from mpl_toolkits.axes_grid1 import make_axes_locatable
+from matplotlib.colors import LogNorm
+
+from ehtplot.extra.visibility import visibility
+from ehtplot.extra.tracks     import tracks
+
+
 def plot_VA(ax1, array, pad=8, M=64,
             name=None, norm=True, scale='lin',
             btracks=True, colorbar=True,
             lim_lin=np.array([0,1]), lim_log=False, norm_num=1,
             bounds='default', x_label=True, y_label=True, zoom=True,
-            font=10.56, colorbar_ticks='set', tick_color='w', cb_tick_color='k'):
+            font=10.56, colorbar_ticks='set', tick_color='w', cb_tick_color='k',
+            image=False, dtype=np.float64):
     """!@brief Makes a plot of a visibility amplitude map.
 
     This can be used for a single image or for multiple subplots,
@@ -49,7 +58,9 @@ def plot_VA(ax1, array, pad=8, M=64,
     @param ax1 the name of the subplot (where applicable) where you
     want to plot your image, see the example code above.
 
-    @param array 2D numpy array of the image to be plotted.
+    @param array 2D numpy array of the visibility amplitude map to be
+    plotted, as computed by ehtplot.extra.visibility.visibility(). A
+    complex array is taken as the visibilities themselves.
 
     @param name optional keyword, default set to None. If not None must be a
     string and will add a text label to the plot equal to this string.
@@ -62,7 +73,8 @@ def plot_VA(ax1, array, pad=8, M=64,
     supported, this sets the scale of the color map.
 
     @param btracks optional keyword, default set to True, if True will
-    plot the baseline tracks for the EHT over the VA map.
+    plot the baseline tracks for the EHT over the VA map.  A string
+    selects a track set registered in ehtplot.extra.tracks instead.
 
     @param font this is an optional keyword, default is set to 20,
     this sets the font size for the axis labels, and numbers as well
@@ -87,6 +99,13 @@ def plot_VA(ax1, array, pad=8, M=64,
     @param pad int, optional keyword, default set to 8, factor by
     which I want to pad my arrays before taking the fft.
 
+    @param image optional keyword, default set to False. If True,
+    `array` is an image and its visibility amplitudes are computed with
+    ehtplot.extra.visibility.visibility() using `pad`.
+
+    @param dtype optional keyword, default set to numpy.float64. The
+    precision of the fft when `image` is True.
+
     @param M int, optional keyword, default set to 64, size the the
     array in units of \f$ GM/c^2 \f$.
 
@@ -118,8 +137,16 @@ def plot_VA(ax1, array, pad=8, M=64,
     the color of the ticks for the colobar, as long as colorbar not
     set to 'top'.
 
+    @return the matplotlib AxesImage, which a Panel with
+    `sharecolorbar` uses to draw one colorbar for its group.
+
     """
 
+    if image:
+        array = visibility(array, pad=pad, part='amplitude', dtype=dtype)
+    elif np.iscomplexobj(array):
+        array = np.abs(array)
+
     x       = np.shape(array)[0]
     r0      = x*np.sqrt(27)/M # this is the radius of the black hole shadow
     uvpix   = 0.6288/pad
@@ -137,15 +164,15 @@ def plot_VA(ax1, array, pad=8, M=64,
             divider1 = make_axes_locatable(ax1)
             cax1     = divider1.append_axes("right", size="7%", pad=0.05)
             if colorbar_ticks == 'auto':
-                cbar1 = plt.colorbar(im1, cax=cax1)
+                cbar1 = ax1.figure.colorbar(im1, cax=cax1)
             else:
-                cbar1 = plt.colorbar(im1, cax=cax1, ticks=[0,0.2,0.4,0.6,0.8,1])
+                cbar1 = ax1.figure.colorbar(im1, cax=cax1, ticks=[0,0.2,0.4,0.6,0.8,1])
             cbar1.ax.tick_params(labelsize=font, color=cb_tick_color,width=1.5, direction='in')
         elif colorbar == 'top':
             divider1 = make_axes_locatable(ax1)
             cax1     = divider1.append_axes("top", size="7%", pad=0.05)
-            if colorbar_ticks == 'auto': cbar1    = plt.colorbar(im1,orientation="horizontal", cax=cax1)
-            else: cbar1    = plt.colorbar(im1, cax=cax1,orientation="horizontal", ticks=[0,0.2,0.4,0.6,0.8])
+            if colorbar_ticks == 'auto': cbar1    = ax1.figure.colorbar(im1,orientation="horizontal", cax=cax1)
+            else: cbar1    = ax1.figure.colorbar(im1, cax=cax1,orientation="horizontal", ticks=[0,0.2,0.4,0.6,0.8])
             cbar1.ax.tick_params(labelsize=font)#, color='w',width=1.5, direction='in')
             cbar1.ax.xaxis.set_ticks_position('top')
     if scale == 'log':
@@ -160,21 +187,20 @@ def plot_VA(ax1, array, pad=8, M=64,
         if colorbar == True:
             divider1 = make_axes_locatable(ax1)
             cax1     = divider1.append_axes("right", size="7%", pad=0.05)
-            cbar1    = plt.colorbar(im1, cax=cax1)
+            cbar1    = ax1.figure.colorbar(im1, cax=cax1)
             cbar1.ax.tick_params(labelsize=font, color=cb_tick_color, direction='in')
         elif colorbar== 'top':
             divider1 = make_axes_locatable(ax1)
             cax1     = divider1.append_axes("top", size="7%", pad=0.05)
-            cbar1    = plt.colorbar(im1,orientation="horizontal", cax=cax1)
+            cbar1    = ax1.figure.colorbar(im1,orientation="horizontal", cax=cax1)
             cbar1.ax.tick_params(labelsize=font)#, color=
             cbar1.ax.xaxis.set_ticks_position('top')
     if x_label == True:
         ax1.set_xlabel('$u$ (G $\lambda$)',fontsize=font)
     if y_label == True:
         ax1.set_ylabel('$v$ (G $\lambda$)',fontsize=font)
-    if btracks == True:
-        path    = __file__.replace('my_plot.pyc', '')
-        U, V    = np.load(path+'U.npy'), np.load(path+'V.npy')
+    if btracks:
+        U, V    = tracks(btracks if isinstance(btracks, str) else 'eht')
         U,V     = U*10**(-6),V*10**(-6)
         ax1.scatter( U, V, c='w', s=2, marker='o',edgecolors='none')
         ax1.scatter(-U,-V, c='w', s=2, marker='o',edgecolors='none')
@@ -199,3 +225,5 @@ def plot_VA(ax1, array, pad=8, M=64,
         ax1.set_ylim(-1*temp[0], -1*temp[1])
         if name !=None:
             ax1.text(.9*temp[0],-.9*temp[0], name, fontsize=font, color='w') #makes the text label
+
+    return im1
@@ -16,12 +16,21 @@
 # You should have received a copy of the GNU General Public License
 # along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
 
+import numpy as np
+import matplotlib.patheffects as PathEffects
+from mpl_toolkits.axes_grid1 import make_axes_locatable
+
+from ehtplot.extra.visibility import visibility
+from ehtplot.extra.tracks     import tracks
+
+
 def plot_VP(ax1, array, pad=8, M=64,
             name=None,
             btracks=True, colorbar=True,
             white_width=5, interpolation='bilinear',
             x_label=True, y_label=True, zoom=True,
-            font=10.56, tick_color='k', cb_tick_color='k'):
+            font=10.56, tick_color='k', cb_tick_color='k',
+            image=False, dtype=np.float64):
     """!@brief Makes a plot of a visibility phase map.
 
     This can be used for a single image or for multiple subplots,
@@ -49,14 +58,17 @@ def plot_VP(ax1, array, pad=8, M=64,
     @param ax1 the name of the subplot (where applicable) where you
     want to plot your image, see the example code above.
 
-    @param array 2D numpy array of the image to be plotted.
+    @param array 2D numpy array of the visibility phase map to be
+    plotted, as computed by ehtplot.extra.visibility.visibility(). A
+    complex array is taken as the visibilities themselves.
 
     @param name optional keyword, default set to None. If not None
     must be a string and will add a text label to the plot equal to
     this string.
 
     @param btracks optional keyword, default set to True, if True will
-    plot the baseline tracks for the EHT over the VA map.
+    plot the baseline tracks for the EHT over the VA map.  A string
+    selects a track set registered in ehtplot.extra.tracks instead.
 
     @param font optional keyword, default set to 20, this sets the
     font size for the axis labels, and numbers as well as the numbers
@@ -69,6 +81,13 @@ def plot_VP(ax1, array, pad=8, M=64,
     @param pad int, optional keyword, default set to 8, factor by
     which I want to pad my arrays before taking the fft.
 
+    @param image optional keyword, default set to False. If True,
+    `array` is an image and its visibility phases are computed with
+    ehtplot.extra.visibility.visibility() using `pad`.
+
+    @param dtype optional keyword, default set to numpy.float64. The
+    precision of the fft when `image` is True.
+
     @param M int, optional keyword, default set to 64, size the the
     array in units of \f$ GM/c^2 \f$.
 
@@ -92,8 +111,16 @@ def plot_VP(ax1, array, pad=8, M=64,
     used in the plot, the options are the same as those for
     matplotlib.
 
+    @return the matplotlib AxesImage, which a Panel with
+    `sharecolorbar` uses to draw one colorbar for its group.
+
     """
 
+    if image:
+        array = visibility(array, pad=pad, part='phase', dtype=dtype)
+    elif np.iscomplexobj(array):
+        array = np.angle(array)
+
     x       = np.shape(array)[0]
     r0      = x*np.sqrt(27)/M # this is the radius of the black hole shadow
     uvpix   = 0.6288/pad
@@ -103,28 +130,26 @@ def plot_VP(ax1, array, pad=8, M=64,
     array[np.where(array >  np.pi)] = array[np.where(array >  np.pi)]-2.0*np.pi
     array[np.where(array < -np.pi)] = array[np.where(array < -np.pi)]+2.0*np.pi
 
-    plt.set_cmap('hsv')
     im1=ax1.imshow(array,extent=[x/2*uvpix,-x/2*uvpix,-x/2*uvpix,x/2*uvpix],
-                   vmin=-np.pi, vmax=np.pi,
+                   vmin=-np.pi, vmax=np.pi, cmap='hsv',
                    origin='lower', interpolation=interpolation)
     if colorbar == True:
         divider1 = make_axes_locatable(ax1)
         cax1     = divider1.append_axes("right", size="7%", pad=0.05)
-        cbar1    = plt.colorbar(im1, cax=cax1)
+        cbar1    = ax1.figure.colorbar(im1, cax=cax1)
         cbar1.ax.tick_params(labelsize=font, color=cb_tick_color, width=1.5, direction='in')
     elif colorbar == 'top':
         divider1 = make_axes_locatable(ax1)
         cax1     = divider1.append_axes("top", size="7%", pad=0.05)
-        cbar1    = plt.colorbar(im1,orientation="horizontal", cax=cax1)
+        cbar1    = ax1.figure.colorbar(im1,orientation="horizontal", cax=cax1)
         cbar1.ax.tick_params(labelsize=font)#, color='w',width=1.5, direction='in')
         cbar1.ax.xaxis.set_ticks_position('top')
     if x_label == True:
         ax1.set_xlabel('$u$ (G $\lambda$)', fontsize=font)
     if y_label == True:
         ax1.set_ylabel('$v$ (G $\lambda$)', fontsize=font)
-    if btracks == True:
-        path    = __file__.replace('my_plot.pyc', '')
-        U, V    = np.load(path+'U.npy'), np.load(path+'V.npy')
+    if btracks:
+        U, V    = tracks(btracks if isinstance(btracks, str) else 'eht')
         U,V     = U*10**(-6),V*10**(-6)
         ax1.scatter( U, V, c='k', s=2, marker='o', edgecolors='none')
         ax1.scatter(-U,-V, c='k', s=2, marker='o', edgecolors='none')
@@ -145,3 +170,5 @@ def plot_VP(ax1, array, pad=8, M=64,
         if name != None:
             txt = ax1.text(.9*temp[0],-.9*temp[0], name, fontsize=font, color='k') #makes the text label
             txt.set_path_effects([PathEffects.withStroke(linewidth=white_width, foreground='w')])
+
+    return im1
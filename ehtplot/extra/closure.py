@@ -0,0 +1,182 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Closure phases and closure amplitudes of image stacks
+
+The stations of an array are given by their projected positions in
+the uv-plane, in wavelengths, so the baseline from station `i` to
+station `j` is `xy[j] - xy[i]`.  The positions may have leading
+dimensions, e.g., one set per time stamp of an observation.  All
+baselines at all time stamps are sampled in one call of the
+visibility sampler, and all closure quantities are then formed with
+precomputed index arrays:
+
+    c = closures(stack, xy, psize) # stack is (T, H, W); xy is (N, S, 2)
+    c.phase                        # (T, N, S*(S-1)*(S-2)/6) radians
+    labels(c.triangles, names)     # ["ALMA-APEX-SMA", ...]
+
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+from collections import namedtuple
+from functools   import lru_cache
+from itertools   import combinations
+
+import numpy as np
+
+from ehtplot.extra.visibility import sampler
+
+
+Closures = namedtuple('Closures', ['vis', 'phase', 'logamp', 'baselines',
+                                   'triangles', 'quadrangles'])
+Closures.__doc__ = """Visibilities and closure quantities of an image stack
+
+Attributes:
+    vis (numpy.ndarray): Complex visibilities, `(T, ..., B)`.
+    phase (numpy.ndarray): Closure phases in radians, `(T, ..., NT)`.
+    logamp (numpy.ndarray): Log closure amplitudes, `(T, ..., NQ, 2)`.
+    baselines (numpy.ndarray): Station pairs, `(B, 2)`.
+    triangles (numpy.ndarray): Station triples, `(NT, 3)`.
+    quadrangles (numpy.ndarray): Station quadruples, `(NQ, 4)`.
+"""
+
+
+@lru_cache(maxsize=32)
+def _indices(n):
+    """Station and baseline indices of all closures of `n` stations"""
+    bl  = np.array(list(combinations(range(n), 2)), dtype=int).reshape(-1, 2)
+    tri = np.array(list(combinations(range(n), 3)), dtype=int).reshape(-1, 3)
+    qd  = np.array(list(combinations(range(n), 4)), dtype=int).reshape(-1, 4)
+
+    b = np.full((n, n), -1, dtype=int) # baseline index of station pairs
+    b[bl[:, 0], bl[:, 1]] = np.arange(len(bl))
+
+    i, j, k    = tri.T
+    tri_bl     = np.stack([b[i, j], b[j, k], b[i, k]], axis=-1)
+    i, j, k, l = qd.T
+    qd_bl      = np.stack([b[i, j], b[k, l], b[i, k], b[j, l],
+                           b[i, l], b[j, k]], axis=-1)
+    for a in (bl, tri, qd, tri_bl, qd_bl):
+        a.setflags(write=False)
+    return bl, tri, qd, tri_bl, qd_bl
+
+
+def baselines(n):
+    """Station pairs `(i, j)`, `i < j`, in the order of the visibilities"""
+    return _indices(n)[0]
+
+
+def triangles(n):
+    """Station triples `(i, j, k)`, `i < j < k`, of the closure phases"""
+    return _indices(n)[1]
+
+
+def quadrangles(n):
+    """Station quadruples `(i, j, k, l)` of the closure amplitudes"""
+    return _indices(n)[2]
+
+
+def closure_phases(vis, n):
+    """!@brief Computes the closure phases of all triangles.
+
+    @param vis complex numpy array with the baselines of `n` stations,
+    ordered as baselines(n), in the last dimension.
+
+    @param n the number of stations.
+
+    @return the closure phases arg(V_ij V_jk V_ki) in radians, with the
+    triangles, ordered as triangles(n), in the last dimension.
+
+    """
+    t = _indices(n)[3]
+    return np.angle(vis[..., t[:, 0]] * vis[..., t[:, 1]] *
+                    np.conj(vis[..., t[:, 2]]))
+
+
+def closure_amplitudes(vis, n, log=True):
+    """!@brief Computes the closure amplitudes of all quadrangles.
+
+    Each quadrangle `(i, j, k, l)` has two independent closure
+    amplitudes, |V_ij V_kl| / |V_ik V_jl| and |V_il V_jk| / |V_ik V_jl|,
+    which are returned along the last dimension.
+
+    @param vis complex numpy array with the baselines of `n` stations,
+    ordered as baselines(n), in the last dimension.
+
+    @param n the number of stations.
+
+    @param log optional keyword, default set to True. If True return
+    the natural logarithms of the closure amplitudes.
+
+    @return the (log) closure amplitudes with shape `vis.shape[:-1] +
+    (NQ, 2)`, with the quadrangles ordered as quadrangles(n).
+
+    """
+    q = _indices(n)[4]
+    with np.errstate(divide='ignore'):
+        a = np.log(np.abs(vis))
+    den = a[..., q[:, 2]] + a[..., q[:, 3]]
+    out = np.stack([a[..., q[:, 0]] + a[..., q[:, 1]] - den,
+                    a[..., q[:, 4]] + a[..., q[:, 5]] - den], axis=-1)
+    return out if log else np.exp(out)
+
+
+def closures(imgs, xy, psize, threads=1, **kwargs):
+    """!@brief Samples the visibilities of all baselines and forms all closures.
+
+    @param imgs 2D numpy array of an image, or a 3D `(T, H, W)` numpy
+    array of images.
+
+    @param xy numpy array of the projected station positions in
+    wavelengths, with shape `(..., S, 2)`; the leading dimensions,
+    e.g., time stamps, are carried over to the outputs.
+
+    @param psize the pixel size of the images in radians.
+
+    @param threads optional keyword, default set to 1. Number of
+    threads used by the FFTs.
+
+    @param kwargs optional keywords passed to the visibility Sampler.
+
+    @return a Closures namedtuple; arrays for a single image have no
+    leading `T` dimension.
+
+    """
+    imgs = np.asarray(imgs)
+    xy   = np.asarray(xy, dtype=float)
+    n    = xy.shape[-2]
+    if n < 3:
+        raise ValueError("closures need at least 3 stations")
+
+    bl = baselines(n)
+    uv = xy[..., bl[:, 1], :] - xy[..., bl[:, 0], :] # (..., B, 2)
+    s  = sampler(uv[..., 0].ravel(), uv[..., 1].ravel(),
+                 imgs.shape[-2:], psize, **kwargs)
+
+    vis = s(imgs, threads=threads)
+    vis = vis.reshape(vis.shape[:-1] + uv.shape[:-1])
+
+    return Closures(vis, closure_phases(vis, n), closure_amplitudes(vis, n),
+                    bl, triangles(n), quadrangles(n))
+
+
+def labels(indices, names, sep='-'):
+    """Labels of baselines, triangles, or quadrangles from station names"""
+    return [sep.join(names[i] for i in row) for row in np.asarray(indices)]
@@ -17,10 +17,11 @@
 # along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
 
 import numpy as np
-import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from matplotlib.colors import LogNorm
 
+from ehtplot.helpers import crop_to_view
+
 
 def plot_image(ax1, array,
                name=None, norm=True, scale='lin',
@@ -104,6 +105,9 @@ def plot_image(ax1, array,
     will zoom in to about 20 \f$ GM/c^2 \f$ on each side, if not set
     to True, will leave the full array visible.
 
+    @return the matplotlib AxesImage, which a Panel with
+    `sharecolorbar` uses to draw one colorbar for its group.
+
     """
 
     x = np.shape(array)[0]
@@ -112,54 +116,61 @@ def plot_image(ax1, array,
     if norm == True:
         array = array/(np.max(array))*norm_num
 
+    def show(array, extent, **kwargs):
+        if zoom == True: # only draw the visible part and a margin
+            lim = [-r0M*2, r0M*2]
+            array, extent = crop_to_view(array, extent, lim, lim)
+        return ax1.imshow(array, extent=extent, origin='lower',
+                          interpolation='bilinear', **kwargs)
+
     if scale == 'lin':
         if flip_x == True:
             array = np.fliplr(array)
-            im1   = ax1.imshow(array, extent=[M/2.0,-M/2.0,-M/2.0,M/2.0],
-                               vmin=lim_lin[0], vmax=lim_lin[1],
-                               origin='lower', interpolation='bilinear')
+            im1   = show(array, [M/2.0,-M/2.0,-M/2.0,M/2.0],
+                         vmin=lim_lin[0], vmax=lim_lin[1])
         else:
-            im1   = ax1.imshow(array, extent=[-M/2.0,M/2.0,-M/2.0,M/2.0],
-                               vmin=lim_lin[0], vmax=lim_lin[1],
-                               origin='lower', interpolation='bilinear')
+            im1   = show(array, [-M/2.0,M/2.0,-M/2.0,M/2.0],
+                         vmin=lim_lin[0], vmax=lim_lin[1])
         if colorbar==True:
             divider1 = make_axes_locatable(ax1)
             cax1     = divider1.append_axes("right", size="7%", pad=0.05)
             if colorbar_ticks == 'auto':
-                cbar1 = plt.colorbar(im1, cax=cax1)
+                cbar1 = ax1.figure.colorbar(im1, cax=cax1)
             else:
-                cbar1 = plt.colorbar(im1, cax=cax1, ticks=[0,0.2,0.4,0.6,0.8,1])
+                cbar1 = ax1.figure.colorbar(im1, cax=cax1, ticks=[0,0.2,0.4,0.6,0.8,1])
             cbar1.ax.tick_params(width=1,direction='in')
         elif colorbar== 'top':
             divider1 = make_axes_locatable(ax1)
             cax1     = divider1.append_axes("top", size="7%", pad=0.05)
             if colorbar_ticks == 'auto':
-                cbar1 = plt.colorbar(im1, cax=cax1, orientation="horizontal")
+                cbar1 = ax1.figure.colorbar(im1, cax=cax1, orientation="horizontal")
             else:
-                cbar1 = plt.colorbar(im1, cax=cax1, orientation="horizontal",
+                cbar1 = ax1.figure.colorbar(im1, cax=cax1, orientation="horizontal",
                                      ticks=[0,0.2,0.4,0.6,0.8])
             cbar1.ax.xaxis.set_ticks_position('top')
     elif scale == 'log':
         if flip_x == True:
             array = np.fliplr(array)
         if type(lim_log) == bool:
-            im1=ax1.imshow(array, extent=[M/2.0,-M/2.0,-M/2.0,M/2.0],
-                           norm=LogNorm(),
-                           origin='lower', interpolation='bilinear')
+            vmax = np.max(array)
+            vmin = np.min(array, where=array > 0, initial=np.inf)
+            if not np.isfinite(vmin): # nothing positive to show
+                vmin = vmax = 1
+            im1=show(array, [M/2.0,-M/2.0,-M/2.0,M/2.0],
+                     norm=LogNorm(vmin=vmin, vmax=vmax))
         else:
-            im1=ax1.imshow(array, extent=[-M/2.0,M/2.0,-M/2.0,M/2.0],
-                           norm=LogNorm(vmin=lim_log[0], vmax=lim_log[1]),
-                           origin='lower', interpolation='bilinear')
+            im1=show(array, [-M/2.0,M/2.0,-M/2.0,M/2.0],
+                     norm=LogNorm(vmin=lim_log[0], vmax=lim_log[1]))
         if colorbar == True:
             divider1 = make_axes_locatable(ax1)
             cax1     = divider1.append_axes("right", size="7%", pad=0.05)
-            cbar1    = plt.colorbar(im1, cax=cax1)
+            cbar1    = ax1.figure.colorbar(im1, cax=cax1)
             cbar1.ax.xaxis.set_ticks_position('top')
             cbar1.ax.tick_params(direction='in')
         elif colorbar== 'top':
             divider1 = make_axes_locatable(ax1)
             cax1     = divider1.append_axes("top", size="7%", pad=0.05)
-            cbar1    = plt.colorbar(im1,orientation="horizontal", cax=cax1)
+            cbar1    = ax1.figure.colorbar(im1,orientation="horizontal", cax=cax1)
             cbar1.ax.xaxis.set_ticks_position('top')
     ax1.tick_params(axis='both', which='major',width=1.5, direction='in')
 
@@ -194,3 +205,5 @@ def plot_image(ax1, array,
         ax1.set_xlabel('X ($GMc^{-2}$)')
     if y_label:
         ax1.set_ylabel('Y ($GMc^{-2}$)')
+
+    return im1
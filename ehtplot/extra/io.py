@@ -17,8 +17,22 @@
 # along with mockservation.  If not, see <http://www.gnu.org/licenses/>.
 
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from timeit import default_timer as timer
 import os
+import re
+import glob
+import hashlib
 import inspect
+import weakref
+import threading
+import importlib.util as iu
+
+import numpy as np
+
+from ehtplot.cache import fingerprint
 
 
 class Bundle(ABC):
@@ -28,11 +42,13 @@ class Bundle(ABC):
     def close(self): # must be implemented by subclasses
         pass
 
-    # Bundle is a context manager so it can be used with the `with` statement
-    def __enter__():
+    # Bundle is a context manager so it can be used with the `with` statement;
+    # handles shared through the pool of open_bundle() stay open
+    def __enter__(self):
         return self
     def __exit__(self, exception_type, exception_val, trace):
-        self.close()
+        if not getattr(self, "_pooled", False):
+            self.close()
 
     # Bundle may conform to the iterator protocal
     def __iter__(self):
@@ -41,6 +57,163 @@ class Bundle(ABC):
         raise NotImplementedError
 
 
+class StreamBundle(Bundle):
+    """A Bundle of frames that are read ahead in background threads
+
+    Subclasses implement `__len__()` and `read(i)`, which returns
+    frame `i` and must be safe to call from several threads at once,
+    e.g., by opening its own file.  Iterating over a StreamBundle
+    yields the frames in order while up to `depth` of the following
+    frames are read by a pool of `workers` threads, so decoding frame
+    k+1, ..., k+depth overlaps with rendering frame k.  With a
+    `budget`, reading ahead also stops when the frames held, counted
+    with the average size of the frames read so far, would exceed
+    `budget` bytes; at least one frame is always read, and only one
+    until the size of a frame is known.
+
+    The waits for frames that are not ready are recorded in `stats()`:
+    if `stall` is a large fraction of the wall time, increase `depth`
+    or `workers`; if it is near zero, `depth` may be reduced to save
+    memory.
+
+    The worker threads are started by the first iteration and stopped
+    by close() or the `with` statement.  A StreamBundle that is not
+    closed stops its threads when it is garbage collected, after
+    the frames already submitted are read.
+
+    Example:
+        class Movie(StreamBundle):
+            def __init__(self, name, **kwargs):
+                super().__init__(**kwargs)
+                self.files = sorted(glob(name + "/frame*.tsv.gz"))
+            def __len__(self):
+                return len(self.files)
+            def read(self, i):
+                return loadtxt(self.files[i])
+
+    """
+    def __init__(self, depth=4, workers=2, budget=None):
+        self.depth   = depth
+        self.workers = workers
+        self.budget  = budget
+        self._pool   = None
+        self._queue  = deque() # futures of the frames read ahead
+        self._next   = 0       # index of the next frame to submit
+        self._lock   = threading.Lock()
+        self._reset_stats()
+
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+
+    @abstractmethod
+    def read(self, i):
+        pass
+
+
+    def __getitem__(self, i):
+        return self.read(i)
+
+
+    def _reset_stats(self):
+        self._stats = {'frames': 0, 'stalls': 0, 'stall': 0.0,
+                       'reads': 0, 'read': 0.0, 'bytes': 0, 'peak': 0}
+
+
+    def _read(self, i):
+        t0    = timer()
+        frame = self.read(i)
+        dt    = timer() - t0
+        with self._lock:
+            self._stats['reads'] += 1
+            self._stats['read']  += dt
+            self._stats['bytes'] += getattr(frame, 'nbytes', 0)
+        return frame
+
+
+    def _size(self):
+        """Average bytes of the frames read so far"""
+        with self._lock:
+            n = self._stats['reads']
+            return self._stats['bytes'] / n if n else 0
+
+
+    def _fill(self):
+        """Submit frames until the read-ahead depth or budget is reached"""
+        size  = self._size()
+        depth = max(self.depth, 1)
+        while self._next < len(self) and len(self._queue) < depth:
+            if (self.budget is not None and self._queue and
+                (size == 0 or (len(self._queue) + 1) * size > self.budget)):
+                break # the frame size is unknown or over budget
+            self._queue.append(self._pool.submit(self._read, self._next))
+            self._next += 1
+        self._stats['peak'] = max(self._stats['peak'],
+                                  int(len(self._queue) * size))
+
+
+    def _cancel(self):
+        for f in self._queue:
+            f.cancel()
+        self._queue.clear()
+
+
+    def __iter__(self):
+        self._cancel()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers)
+            self._stop = weakref.finalize(self, self._pool.shutdown,
+                                          wait=False)
+        self._next = 0
+        self._reset_stats()
+        self._fill()
+        return self
+
+
+    def __next__(self):
+        if self._pool is None: # next() without iter()
+            self.__iter__()
+        if not self._queue:
+            raise StopIteration
+
+        f = self._queue.popleft()
+        if not f.done():
+            t0 = timer()
+            frame = f.result()
+            self._stats['stalls'] += 1
+            self._stats['stall']  += timer() - t0
+        else:
+            frame = f.result()
+        self._stats['frames'] += 1
+        self._fill()
+        return frame
+
+
+    def stats(self):
+        """Prefetch metrics of the current or last iteration
+
+        Returns:
+            dict: "frames" consumed, "stalls" (frames that were not
+                ready when requested), "stall" (seconds waited for
+                them), "reads" and "read" (number of and seconds
+                spent in read() by all workers), "bytes" read, and
+                "peak" (estimated largest number of bytes read ahead).
+
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+    def close(self):
+        self._cancel()
+        if self._pool is not None:
+            self._stop.detach()
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
 class MultipleImplementationError(Exception):
     pass
 
@@ -82,11 +255,86 @@ def open(name, *args, **kwargs):
     return open_x(name, *args, **kwargs)
 
 
-def open_bundle(name, *args, **kwargs):
+_loaders  = {} # loader path -> (mtime, size, Bundle subclass or load())
+_pool     = OrderedDict() # (bundle path, args, kwargs) -> open Bundle
+_lock     = threading.RLock()
+pool_size = 8
+
+
+def _loader(full_name):
+    """Import a loader file once and find its entry point
+
+    The entry point is cached by the path of the loader file, and
+    the file is imported again only if its modification time or size
+    changes.
+
+    Returns:
+        The `(mtime, size)` stamp of the loader file and the entry
+            point, i.e., a Bundle subclass or a load() function.
+
+    """
+    st  = os.stat(full_name)
+    key = (st.st_mtime_ns, st.st_size)
+    with _lock:
+        hit = _loaders.get(full_name)
+        if hit is not None and hit[:2] == key:
+            return key, hit[2]
+
+    spec   = iu.spec_from_file_location("loader", full_name)
+    loader = iu.module_from_spec(spec)
+    spec.loader.exec_module(loader)
+
+    # Concrete Bundles defined in the loader, e.g., StreamBundle subclasses
+    abcname = fullname(Bundle)
+    mk = [obj for _, obj in inspect.getmembers(loader, inspect.isclass)
+              if abcname in [fullname(c) for c in obj.__mro__[1:]]
+              and obj.__module__ == loader.__name__
+              and not inspect.isabstract(obj)]
+    if len(mk) > 1:
+        raise MultipleImplementationError(
+            "{} subclasses of {} are implemented in loader \"{}\"".
+            format(len(mk), abcname, full_name))
+    entry = mk[0] if mk else loader.load
+
+    with _lock:
+        _loaders[full_name] = key + (entry,)
+    return key, entry
+
+
+def _close_pooled(key, handle, close):
+    """close() of a pooled handle: take it out of the pool and close it"""
+    with _lock:
+        if _pool.get(key) is handle:
+            del _pool[key]
+    handle._pooled = False
+    close()
+
+
+def clear_pool():
+    """Close and forget all Bundle handles kept by open_bundle()"""
+    with _lock:
+        handles = list(_pool.values())
+        _pool.clear()
+    for h in handles:
+        h.close()
+
+
+def open_bundle(name, *args, reuse=False, **kwargs):
     """Open a folder as a data bundle
 
+    The loader of a bundle is imported once and cached until the
+    loader file changes.  With `reuse=True`, opened Bundle handles
+    are kept in a pool of at most `pool_size` handles, closed in
+    least-recently-used order, and opening the same bundle with the
+    same arguments again returns the warm handle.  Pooled handles are
+    shared, so they stay open when used in a `with` statement; call
+    clear_pool() to close them.  Calling close() on a pooled handle
+    takes it out of the pool, and handles opened by an older version
+    of the loader are closed when the bundle is opened again.
+
     Args:
         name:    Name of the data bundle
+        reuse:   Keep the handle in, and take it from, the pool
 
     Returns:
         A handle for the opened data bundle
@@ -99,27 +347,167 @@ def open_bundle(name, *args, **kwargs):
         >>> handle = mock.open_bundle("data_bundle")
 
     """
-    abcname = fullname(Bundle)
-
     for loader_name in ["loader.py",
                         ".loader.py",
                         ".mockservation/loader.py"]:
-        full_name = "{}/{}".format(name, loader_name)
+        full_name = os.path.realpath("{}/{}".format(name, loader_name))
         if os.path.isfile(full_name):
-            import importlib.util as iu
-            spec   = iu.spec_from_file_location("loader", full_name)
-            loader = iu.module_from_spec(spec)
-            spec.loader.exec_module(loader)
-
-            mk = [obj for _, obj in inspect.getmembers(loader, inspect.isclass)
-                      if abcname in [fullname(c) for c in obj.__bases__]]
-            if not mk:
-                return loader.load(name, *args, **kwargs)
-            if len(mk) == 1:
-                return mk[0](name, *args, **kwargs)
-
-            raise MultipleImplementationError(
-                "{} subclasses of {} are implemented for data bundle \"{}\"".
-                format(len(mk), abcname, name))
-
-    raise ImportError("loader not found in data bundle \"{}\"".format(name))
+            break
+    else:
+        raise ImportError("loader not found in data bundle \"{}\"".format(name))
+
+    stamp, entry = _loader(full_name)
+    if not reuse or not isinstance(entry, type):
+        return entry(name, *args, **kwargs)
+
+    path = os.path.realpath(name)
+    try:
+        key = (path, stamp, args, frozenset(kwargs.items()))
+        hash(key)
+    except TypeError: # unhashable arguments cannot be pooled
+        return entry(name, *args, **kwargs)
+
+    with _lock:
+        handle = _pool.get(key)
+        if handle is not None and not getattr(handle, 'closed', False):
+            _pool.move_to_end(key)
+            return handle
+
+    handle = entry(name, *args, **kwargs)
+    with _lock:
+        live = _pool.get(key)
+        if live is not None and not getattr(live, 'closed', False):
+            other, handle = handle, live # opened concurrently
+        else:
+            _pool[key], other = handle, None
+            _pool.move_to_end(key)
+            handle._pooled = True
+            handle.close   = partial(_close_pooled, key, handle, handle.close)
+        # handles of an older loader, then the least recently used
+        stale = [k for k in _pool if k[0] == path and k[1] != stamp]
+        stale = [_pool.pop(k) for k in stale]
+        while len(_pool) > pool_size:
+            stale.append(_pool.popitem(last=False)[1])
+    for h in stale:
+        h.close()
+    if other is not None:
+        other.close()
+    return handle
+
+
+# Sidecar name after ".<source name>.": the tag of the keyworded
+# arguments and the stamp of the source (absent in older sidecars)
+_sidecar = re.compile(r"[0-9a-f]{16}(?:\.([0-9a-f]+-[0-9a-f]+))?\.npy")
+
+
+sidecars = 4 # sidecars with different arguments kept per source
+
+
+def _create(d, prefix):
+    """Create a new temporary file in `d`; return its descriptor and path
+
+    Unlike tempfile.mkstemp(), which always uses mode 0600, the file
+    gets the permissions of a regular new file: the kernel applies
+    the umask to 0666.
+
+    """
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    while True:
+        tmp = os.path.join(d, prefix + os.urandom(6).hex() + ".tmp")
+        try:
+            return os.open(tmp, flags, 0o666), tmp
+        except FileExistsError:
+            continue
+
+
+def _sidecar_dir(src):
+    """Directory of the sidecars of `src`; a user cache if not writable"""
+    d = os.path.dirname(src)
+    if os.access(d, os.W_OK):
+        return d
+    h = hashlib.blake2b(d.encode(), digest_size=8).hexdigest()
+    d = os.environ.get("EHTPLOT_CACHE",
+                       os.path.join(os.path.expanduser("~"), ".cache",
+                                    "ehtplot"))
+    d = os.path.join(d, "sidecars", h)
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def loadtxt(fname, cache=True, **kwargs):
+    """Load a text, e.g., `.tsv.gz`, array through a binary sidecar
+
+    The first call parses `fname` with numpy.loadtxt() and saves the
+    array as a hidden `.npy` sidecar next to it (or in a user cache
+    directory if the bundle is read-only).  Later calls memory-map
+    the sidecar instead of decoding and parsing the text.  The name
+    of the sidecar encodes the keyworded arguments and the size and
+    modification time of `fname`, so a changed source or different
+    arguments never reuse a stale sidecar; writing a new sidecar
+    removes those of older versions of the source and keeps at most
+    `sidecars` per source.  Arguments without a stable fingerprint,
+    e.g., callable objects, are not cached.  Sidecars are written to
+    a temporary file, with the permissions of a regular new file,
+    and renamed, so concurrent readers only ever see complete files.
+
+    Args:
+        fname:   Path of the text file
+        cache:   Use and maintain the sidecar
+        kwargs:  Keyworded arguments passed to numpy.loadtxt()
+
+    Returns:
+        The array; a read-only memory map if it comes from a sidecar
+
+    """
+    if not cache:
+        return np.loadtxt(fname, **kwargs)
+
+    src   = os.path.realpath(fname)
+    st    = os.stat(src)
+    stamp = "{:x}-{:x}".format(st.st_size, st.st_mtime_ns)
+    kwtag = fingerprint(kwargs)
+    if kwtag is None: # e.g. a callable object without a stable digest
+        return np.loadtxt(src, **kwargs)
+    d     = _sidecar_dir(src)
+    base  = "." + os.path.basename(src)
+    path  = os.path.join(d, "{}.{}.{}.npy".format(base, kwtag, stamp))
+
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError): # missing or unreadable; (re)build it
+        pass
+
+    arr = np.loadtxt(src, **kwargs)
+    try:
+        fd, tmp = _create(d, base + ".")
+    except OSError:
+        return arr
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return arr
+
+    # Sidecars of older versions of the source are removed; of those
+    # of the current version, only the `sidecars` newest are kept
+    current = []
+    for old in glob.glob(os.path.join(d, glob.escape(base) + ".*.npy")):
+        m = _sidecar.fullmatch(os.path.basename(old)[len(base)+1:])
+        if m is None:
+            continue
+        try:
+            if m.group(1) != stamp:
+                os.remove(old)
+            elif old != path:
+                current.append((os.stat(old).st_mtime_ns, old))
+        except OSError:
+            pass
+    for _, old in sorted(current, reverse=True)[sidecars-1:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return np.load(path, mmap_mode="r")
@@ -16,21 +16,53 @@
 # You should have received a copy of the GNU General Public License
 # along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from functools          import partial
+
 import numpy as np
+import matplotlib as mpl
+from matplotlib.collections import LineCollection
 from skimage.morphology import skeletonize
 
+from ehtplot.helpers import rebin
+
+
+def translate_threshold(img, threshold=0.5, bins=1024):
+    """Pixel value above which the brightest pixels hold `1-threshold` of the flux
+
+    Instead of sorting all pixels, the pixels are repeatedly
+    histogrammed, weighted by their values, and only the bin where
+    the cumulative flux crosses the threshold is kept, until at most
+    `bins` pixels are left to be sorted or the remaining values are
+    too close to be split by the bins.
 
-def rebin(arr, shape=[32, 32]):
-    reshape = (shape[0], arr.shape[0]//shape[0],
-               shape[1], arr.shape[1]//shape[1])
-    return arr.reshape(reshape).mean(-1).mean(1)
+    """
+    v      = np.ravel(img)
+    target = threshold * np.sum(v)
+    below  = 0.0 # flux of the pixels below the remaining ones
 
+    while len(v) > bins:
+        lo, hi = v.min(), v.max()
+        scale  = bins / (hi - lo) if hi > lo else np.inf
+        if not np.isfinite(scale):
+            break
+        # Bin the values directly so the selection below agrees with
+        # the histogram even when the bin edges cannot be resolved
+        k = np.minimum(((v - lo) * scale).astype(np.intp), bins-1)
+        c = below + np.cumsum(np.bincount(k, weights=v, minlength=bins))
+        i = min(np.searchsorted(c, target, side="left"), bins-1)
+        w = v[k == i]
+        if len(w) == 0 or len(w) == len(v):
+            break # the bins cannot split the values any further
+        if i > 0:
+            below = c[i-1]
+        v = w
 
-def translate_threshold(img, threshold=0.5):
-    threshold *= np.sum(img)
-    s = np.sort(img.flatten())
-    i = np.searchsorted(np.cumsum(s), threshold, side="left")
-    return s[i]
+    s = np.sort(v)
+    i = np.searchsorted(below + np.cumsum(s), target, side="left")
+    return s[min(i, len(s)-1)]
 
 
 def metroize(img, mgrid=32, threshold=0.5):
@@ -40,34 +72,92 @@ def metroize(img, mgrid=32, threshold=0.5):
     return img
 
 
+def metroize_many(imgs, mgrid=32, threshold=0.5, processes=None):
+    """Metroize a stack of images, e.g., the frames of a movie
+
+    Args:
+        imgs (numpy.ndarray): A `(T, H, W)` stack or a list of images.
+        mgrid, threshold: Same as in metroize().
+        processes (int): Number of worker processes; use the number
+            of CPUs if None, and no pool at all if 1.
+
+    Returns:
+        numpy.ndarray: The `(T, mgrid, mgrid)` boolean metroized
+            images; `T` may be zero.
+
+    """
+    if len(imgs) == 0:
+        return np.zeros((0, mgrid, mgrid), dtype=bool)
+
+    func = partial(metroize, mgrid=mgrid, threshold=threshold)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(imgs))
+    if processes <= 1:
+        return np.stack([func(img) for img in imgs])
+
+    chunksize = max(1, len(imgs) // (4 * processes))
+    with ProcessPoolExecutor(processes) as pool:
+        return np.stack(list(pool.map(func, imgs, chunksize=chunksize)))
+
+
+def segments(img):
+    """Half segments and isolated dots of a metroized image
+
+    Every nonzero pixel is connected to its nonzero neighbors by half
+    segments from its center to the midpoints of the connections.  A
+    diagonal connection is skipped if the two pixels are already
+    connected through a horizontal and a vertical connection.  Pixels
+    without any connection become dots.
+
+    Returns:
+        (numpy.ndarray, numpy.ndarray): The `(n, 2, 2)` array of half
+            segments and the `(m, 2)` array of dots, both in `(x, y)`
+            coordinates.
+
+    """
+    on = np.pad(np.asarray(img) > 0.0, 1)
+    s0, s1 = on.shape[0] - 2, on.shape[1] - 2
+    def shift(di, dj): # the neighbors at offset (di, dj) of every pixel
+        return on[1+di:1+di+s0, 1+dj:1+dj+s1]
+
+    pixel = shift(0, 0)
+    count = np.zeros((s0, s1), dtype=int)
+    segs  = []
+    for di in (-1, 0, 1):
+        for dj in (-1, 0, 1):
+            if di == 0 and dj == 0:
+                continue
+            link = pixel & shift(di, dj)
+            if di != 0 and dj != 0:
+                link &= ~(shift(di, 0) | shift(0, dj))
+            count += link
+            i, j = np.nonzero(link)
+            segs.append(np.stack([np.stack([j+0.5, i+0.5], axis=-1),
+                                  np.stack([j+0.5+dj/2, i+0.5+di/2], axis=-1)],
+                                 axis=1))
+
+    i, j = np.nonzero(pixel & (count == 0))
+    return np.concatenate(segs), np.stack([j+0.5, i+0.5], axis=-1)
+
+
 def plot_metroized(ax, img, **kwargs):
     img = metroize(img, **kwargs)
 
     s0 = img.shape[0]
     s1 = img.shape[1]
-    for i in range(s0):
-        for j in range(s1):
-            if img[i,j] == 0.0: continue
-
-            c = 0
-            for ii in [i-1,i,i+1]:
-                for jj in [j-1,j,j+1]:
-                    if ii == i and jj == j:
-                        continue
-                    if ii < 0 or ii >= s0:
-                        continue
-                    if jj < 0 or jj >= s1:
-                        continue
-                    if img[ii,jj] > 0.0:
-                        if ii != i and jj != j:
-                            if img[ii,j] > 0.0 or img[i,jj] > 0.0:
-                                continue
-                        ax.plot([j+0.5,(jj-j)/2+j+0.5],
-                                [i+0.5,(ii-i)/2+i+0.5],
-                                color='k')
-                        c += 1
-            if c == 0:
-                ax.plot([j+0.5], [i+0.5], marker='.', color='k')
+
+    segs, dots = segments(img)
+    ax.add_collection(LineCollection(
+        segs, colors='k',
+        linewidths=mpl.rcParams['lines.linewidth'],
+        capstyle=mpl.rcParams['lines.solid_capstyle'],
+        joinstyle=mpl.rcParams['lines.solid_joinstyle']))
+    if len(dots):
+        ax.scatter(dots[:, 0], dots[:, 1], marker='.', c='k',
+                   s=mpl.rcParams['lines.markersize']**2,
+                   linewidths=mpl.rcParams['lines.markeredgewidth'],
+                   edgecolors='k', zorder=2)
 
     ax.set_aspect('equal')
 
@@ -0,0 +1,85 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Registry of baseline tracks
+
+A track set is a pair of `.npy` files with the u and v coordinates,
+in wavelengths, of the baselines of an array.  Each registered set
+is memory-mapped read-only on first use and cached, so plotting many
+VA/VP maps loads the files once per process.
+
+    U, V = tracks()          # the bundled EHT tracks
+    register('mine', 'u.npy', 'v.npy')
+    U, V = tracks('mine')
+
+"""
+
+from __future__ import absolute_import
+
+import threading
+
+from os.path import dirname, join
+
+import numpy as np
+
+
+_data = join(dirname(__file__), "data")
+
+_registry = {'eht': (join(_data, "U.npy"), join(_data, "V.npy"))}
+_loaded   = {}
+_lock     = threading.Lock()
+
+
+def register(name, u, v):
+    """Register a track set
+
+    Args:
+        name (string): Name of the track set.
+        u (string or numpy.ndarray): Path to the `.npy` file of the
+            u coordinates, or the coordinates themselves.
+        v (string or numpy.ndarray): Same as `u` for v.
+
+    """
+    with _lock:
+        _registry[name] = (u, v)
+        _loaded.pop(name, None)
+
+
+def names():
+    """Names of the registered track sets"""
+    return sorted(_registry)
+
+
+def _load(f):
+    if isinstance(f, str):
+        return np.load(f, mmap_mode='r')
+    arr = np.array(f, dtype=float)
+    arr.setflags(write=False)
+    return arr
+
+
+def tracks(name='eht'):
+    """Return the read-only `(U, V)` arrays of a track set in wavelengths"""
+    with _lock:
+        if name not in _loaded:
+            try:
+                u, v = _registry[name]
+            except KeyError:
+                raise KeyError("unknown track set \"{}\"".format(name))
+            _loaded[name] = (_load(u), _load(v))
+        return _loaded[name]
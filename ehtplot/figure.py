@@ -19,14 +19,133 @@
 from __future__ import absolute_import
 from __future__ import with_statement
 
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
+from io         import BytesIO
+from os.path    import splitext
+from threading  import Lock, RLock
+from weakref    import WeakSet
 
+import numpy             as np
 import matplotlib        as mpl
+import matplotlib.figure
 import matplotlib.pyplot as plt
 
-from ehtplot.panel   import Panel
-from ehtplot.helpers import ensure_list, split_dict, merge_dict
-from ehtplot.layouts import newaxes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from ehtplot.panel    import Panel
+from ehtplot.retained import Retained
+from ehtplot.helpers  import ensure_list, split_dict, merge_dict
+from ehtplot.trace    import span, traced
+from ehtplot.layouts  import newaxes
+from ehtplot.rc       import using, style_rc
+
+
+_raster_formats = ('png', 'jpg', 'jpeg', 'tif', 'tiff', 'webp')
+
+# Figures are built and rendered with the rc parameters of their
+# style in a per-thread view (see ehtplot.rc), so pyplot-free figures
+# in different threads do not wait for each other.  pyplot itself is
+# not thread-safe; everything involving pyplot figures, and retained
+# realizations, holds this lock.
+_lock = RLock()
+
+_live      = WeakSet() # matplotlib figures in use
+_idle      = {}        # pooled matplotlib figures keyed by their properties
+_pool_lock = Lock()
+pool_size  = 8         # maximum number of idle figures kept in the pool
+
+
+def live_figures():
+    """Number of matplotlib figures created by ehtplot and still in use
+
+    Figures returned by Figure.draw() are in use until they are
+    garbage collected; figures used by Figure.drawn() and
+    Figure.save() are released automatically.  Idle figures in the
+    pool are not counted.
+
+    """
+    return len(_live)
+
+
+def clear_pool():
+    """Drop all idle figures kept for reuse"""
+    with _pool_lock:
+        _idle.clear()
+
+
+def _acquire(key):
+    """Take an idle figure with properties `key` from the pool"""
+    with _pool_lock:
+        figs = _idle.get(key)
+        return figs.pop() if figs else None
+
+
+def _release(fig):
+    """Close `fig`, or clear it and put it back to the pool"""
+    _live.discard(fig)
+    if fig.canvas.manager is not None: # managed by pyplot
+        plt.close(fig)
+        return
+
+    key = getattr(fig, '_ehtplot_key', None)
+    if key is None:
+        return
+    fig.clear()
+    with _pool_lock:
+        if sum(len(figs) for figs in _idle.values()) < pool_size:
+            _idle.setdefault(key, []).append(fig)
+
+
+def _format(file):
+    """Deduce the output format of `file` from its extension"""
+    ext = splitext(file)[1].lstrip('.').lower()
+    return ext if ext else mpl.rcParams['savefig.format']
+
+
+def _group(fig, files):
+    """Group output files by the render they can share
+
+    Raster outputs with the same dpi share a single Agg render, so
+    they are grouped into a dictionary keyed by dpi.  All other
+    outputs, e.g., vector formats or file objects, have to go through
+    their own backends and are returned as a separate list.
+
+    """
+    tight   = mpl.rcParams['savefig.bbox'] == 'tight'
+    rasters = {}
+    others  = []
+    for f in files:
+        file, dpi = f if isinstance(f, tuple) else (f, None)
+        if dpi is None:
+            dpi = mpl.rcParams['savefig.dpi']
+        if dpi == 'figure':
+            dpi = fig.dpi
+        if (not tight and isinstance(file, str) and
+            _format(file) in _raster_formats):
+            rasters.setdefault(dpi, []).append(file)
+        else:
+            others.append((file, dpi))
+    return rasters, others
+
+
+def _rasterize(fig, dpi):
+    """Render `fig` once with Agg and return the RGBA pixels"""
+    buf = BytesIO()
+    fig.savefig(buf, format='rgba', dpi=dpi)
+    w, h = (int(s) for s in fig.get_size_inches() * dpi)
+    return np.frombuffer(buf.getvalue(), dtype=np.uint8).reshape(h, w, 4)
+
+
+def _encode(rgba, file, dpi):
+    """Encode rendered RGBA pixels to `file` in the same way as Agg"""
+    fmt = _format(file)
+    if fmt in ('jpg', 'jpeg'):
+        # Match FigureCanvasAgg.print_jpg(), which blends
+        # semi-transparent figures against a white background
+        with using({'savefig.facecolor': 'white'}):
+            mpl.image.imsave(file, rgba, format=fmt, origin='upper', dpi=dpi)
+    else:
+        mpl.image.imsave(file, rgba, format=fmt, origin='upper', dpi=dpi)
 
 
 class Figure(object):
@@ -39,12 +158,32 @@ class Figure(object):
     subpanels in it.  See the documentation of the ehtplot Panel class
     for details.
 
+    By default, matplotlib figures are created with pyplot.  With
+    the figure property `pyplot=False`, Figure instead builds a
+    `matplotlib.figure.Figure` with its own Agg canvas and never
+    touches pyplot, so it is safe to draw and save different ehtplot
+    Figures from different threads.  Each thread builds and renders
+    with the rc parameters of its Figure's style (see ehtplot.rc), so
+    such Figures are built, rendered, and encoded concurrently;
+    pyplot figures still take turns.
+
+    Figures created by draw() are owned by the caller, who should
+    close them.  drawn() and save() release their figures
+    automatically.  With the additional property `reuse=True` (only
+    for `pyplot=False`), released figures are cleared and kept in a
+    small pool, and later figures with the same size and style reuse
+    them and their Agg canvases.  live_figures() reports the number of
+    figures still in use.  Long export loops should use `reuse=True`:
+    without it, every save renders on a new Agg canvas, and the native
+    allocations matplotlib makes per renderer grow the resident memory
+    by a few KiB per save even though no figure is leaked.
+
     Attributes:
         _prop_keys (list of strings): List of graphics keywords used by
             Figure to create a figure.
 
     """
-    _default_kwprops = {'style': 'ehtplot'}
+    _default_kwprops = {'style': 'ehtplot', 'pyplot': True, 'reuse': False}
     _prop_keys = (list(_default_kwprops.keys()) +
                   ['figsize', 'dpi', 'facecolor', 'edgecolor', 'frameon'])
 
@@ -67,10 +206,15 @@ class Figure(object):
             panel (ehtplot.Panel): The root panel of the Figure.
             kwprops (dict): The default keywords for creating a
                 figure.
+            realized (ehtplot.retained.Retained): The retained-mode
+                realization of the Figure created by realize(), or
+                None.
 
         """
-        self.panel   = panel
-        self.kwprops = merge_dict(self._default_kwprops, kwargs)
+        self.panel    = panel
+        self.kwprops  = merge_dict(self._default_kwprops, kwargs)
+        self.realized = None
+        self._style   = None # style of the realization
 
 
     def update(self, **kwargs):
@@ -79,6 +223,28 @@ class Figure(object):
         return self
 
 
+    def __getstate__(self):
+        """Pickle the tree and properties but not the realization"""
+        state = self.__dict__.copy()
+        state['realized'] = None
+        state['_style']   = None
+        return state
+
+
+    @contextmanager
+    def _rc(self, style, pyplot=True, rc={}):
+        """Context in which the rc parameters follow `style`
+
+        The parameters are only changed for the calling thread.  With
+        `pyplot`, the context also holds the module lock, as pyplot
+        is not thread-safe.  `rc` overrides the style.
+
+        """
+        with (_lock if pyplot else nullcontext()), \
+             using(style_rc(style)), using(rc):
+            yield
+
+
     @contextmanager
     def __call__(self, **kwargs):
         """Figure realizer
@@ -97,17 +263,26 @@ class Figure(object):
         """
         kwprops = merge_dict(self.kwprops, kwargs)
         style   = kwprops.pop('style')
+        pyplot  = kwprops.pop('pyplot')
+        reuse   = kwprops.pop('reuse')
 
-        with mpl.rc_context():
-            mpl.rcdefaults()
-            plt.style.use(style)
-
-            imode = mpl.is_interactive()
+        with span('Figure', 'figure', node=True), self._rc(style, pyplot):
+            imode = pyplot and mpl.is_interactive()
             if imode:
                 plt.ioff()
 
-            fig = plt.figure(**kwprops)
-            ax  = newaxes(fig)
+            if pyplot:
+                fig = plt.figure(**kwprops)
+            else:
+                key = repr((style, sorted(kwprops.items()))) if reuse else None
+                fig = _acquire(key) if reuse else None
+                if fig is None:
+                    fig = mpl.figure.Figure(**kwprops)
+                    FigureCanvasAgg(fig)
+                    fig._ehtplot_key = key
+            _live.add(fig)
+
+            ax = newaxes(fig)
             yield fig, ax
 
             if imode:
@@ -128,6 +303,10 @@ class Figure(object):
             **kwargs (dict): Arbitrary keyworded arguments that are
                 split into properties of the figure and the panel.
 
+        Returns:
+            matplotlib.figure.Figure: The drawn figure, which the
+                caller should close when done.
+
         """
         kwargs, kwprops = split_dict(kwargs, self._prop_keys)
         kwprops = merge_dict(self.kwprops, kwprops)
@@ -138,14 +317,157 @@ class Figure(object):
         return fig
 
 
-    def show(self, *args, **kwargs):
-        """Show the Figure"""
+    @contextmanager
+    def drawn(self, *args, **kwargs):
+        """Draw the Figure and release it when leaving the context
+
+        Example:
+            with fig.drawn() as f:
+                f.savefig("demo.png")
+
+        On exit, pyplot figures are closed and, if the figure property
+        `reuse` is True, pyplot-free figures are returned to the pool.
+
+        Args:
+            *args (tuple): Variable length argument list that is
+                passed to draw().
+            **kwargs (dict): Arbitrary keyworded arguments that are
+                passed to draw().
+
+        """
         fig = self.draw(*args, **kwargs)
+        try:
+            yield fig
+        finally:
+            _release(fig)
+
+
+    def realize(self, *args, **kwargs):
+        """Realize the Figure in retained mode
+
+        Draw the Figure like draw() but keep a map from each Panel and
+        Visual to the matplotlib axeses and artists it created.  After
+        modifying the tree with `Panel.update()` or `Visual.update()`,
+        call redraw() to re-execute only the dirty visuals.
+
+        Args:
+            *args (tuple): Variable length argument list that is
+                passed to the root panel.
+            **kwargs (dict): Arbitrary keyworded arguments that are
+                split into properties of the figure and the panel.
+
+        Returns:
+            ehtplot.retained.Retained: The retained realization, whose
+                `fig` attribute is the matplotlib Figure.
+
+        """
+        kwargs, kwprops = split_dict(kwargs, self._prop_keys)
+        kwprops = merge_dict(self.kwprops, kwprops)
+
+        self._style = kwprops['style']
+        with self(**kwprops) as (fig, ax):
+            self.realized = Retained(fig, ax, self.panel, *args, **kwargs)
+
+        return self.realized
+
+
+    def redraw(self):
+        """Redraw the dirty part of a Figure realized by realize()
+
+        Returns:
+            int: The number of visuals re-executed.
+
+        """
+        if self.realized is None:
+            raise RuntimeError("Figure has not been realized")
+
+        with self._rc(self._style):
+            return self.realized.redraw()
+
+
+    def show(self, *args, **kwargs):
+        """Show the Figure
+
+        Showing needs the interactive canvas of the pyplot backend, so
+        the figure is drawn with pyplot even if the figure property
+        `pyplot` is False.
+
+        """
+        fig = self.draw(*args, **merge_dict(kwargs, {'pyplot': True,
+                                                     'reuse':  False}))
         fig.show()
 
 
+    @traced(lambda self: 'Figure.save', 'figure', node=False)
     def save(self, files, *args, **kwargs):
-        """Save the Figure"""
-        fig = self.draw(*args, **kwargs)
-        for file in ensure_list(files):
-            fig.savefig(file)
+        """Save the Figure
+
+        The figure is drawn once and then exported to all `files`.
+        Raster outputs that share the same dpi are rendered only once
+        with Agg; the resulting pixels are then encoded to each
+        requested format.  Vector outputs go through their own
+        backends once each.  Only the encoding of raster outputs runs
+        outside of the module lock.
+
+        Args:
+            files (string, tuple, or list of them): Names of the
+                output files.  An entry can also be a `(file, dpi)`
+                tuple, which overrides "savefig.dpi" for that file.
+            *args (tuple): Variable length argument list that is
+                passed to draw().
+            cache (ehtplot.cache.RenderCache): If given, outputs
+                whose content hash is in the cache are linked or
+                copied from it, and only the missing outputs are
+                rendered and added to it.
+            **kwargs (dict): Arbitrary keyworded arguments that are
+                passed to draw().
+
+        Returns:
+            int: The number of renders performed to save all `files`.
+
+        """
+        cache = kwargs.pop('cache', None)
+        files = ensure_list(files)
+        if cache is not None:
+            key   = cache.key(self, args, kwargs)
+            files = [f for f in files if not cache.get(key, f)]
+            if not files:
+                return 0
+
+        renders = self._save(files, *args, **kwargs)
+
+        if cache is not None:
+            for f in files:
+                cache.put(key, f)
+        return renders
+
+
+    def _save(self, files, *args, **kwargs):
+        """Draw the Figure once and export it to all `files`
+
+        The figure is built and rendered with the rc parameters of its
+        style, except for the "savefig.*" parameters, which are taken
+        from the calling thread as for matplotlib's savefig().
+
+        """
+        kwprops = merge_dict(self.kwprops,
+                             split_dict(kwargs, self._prop_keys)[1])
+        session = {k: v for k, v in mpl.rcParams.items()
+                   if k.startswith('savefig.')}
+        with self._rc(kwprops['style'], kwprops['pyplot'], session), \
+             self.drawn(*args, **kwargs) as fig:
+            rasters, others = _group(fig, files)
+            rgbas = {}
+            for dpi in rasters:
+                with span('rasterize', 'save'):
+                    rgbas[dpi] = _rasterize(fig, dpi)
+            for file, dpi in others:
+                with span('savefig', 'save'):
+                    fig.savefig(file, dpi=dpi)
+
+        for dpi, group in rasters.items():
+            for file in group:
+                with span('encode', 'save'):
+                    _encode(rgbas[dpi], file, dpi)
+
+        return len(rasters) + len(others)
@@ -16,6 +16,11 @@
 # You should have received a copy of the GNU General Public License
 # along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import division
+
+import numpy as np
+
+
 def ensure_list(obj, valid=lambda x: True):
     """Convert `obj` to a list if it is not already one"""
     if isinstance(obj, list):
@@ -106,3 +111,124 @@ def merge_dict(d1, d2):
     out = d1.copy()
     out.update(d2)
     return out
+
+
+def _span(n, lo, hi, lim, margin):
+    """Range of the `n` pixels from `lo` to `hi` that overlap `lim`"""
+    px = (hi - lo) / n # signed pixel size
+    i0, i1 = sorted(((lim[0] - lo) / px, (lim[1] - lo) / px))
+    i0 = min(max(int(np.floor(i0)) - margin, 0), n)
+    i1 = max(min(int(np.ceil (i1)) + margin, n), i0)
+    return i0, i1, lo + i0 * px, lo + i1 * px
+
+
+def crop_to_view(img, extent, xlim, ylim, origin='lower', margin=2):
+    """Slice an image to the part visible in a view
+
+    Args:
+        img (2D array): Image as passed to imshow().
+        extent (list): Extent [left, right, bottom, top] of `img` as
+            passed to imshow(); may be reversed.
+        xlim, ylim (list): Limits of the view in data coordinates.
+        origin (string): "lower" or "upper", as in imshow().
+        margin (int): Number of extra pixels kept on each side for
+            the interpolation.
+
+    Returns:
+        tuple: A view of `img` and its extent.
+
+    """
+    n, m = img.shape[:2]
+    j0, j1, left, right = _span(m, extent[0], extent[1], xlim, margin)
+    if origin == 'lower':
+        i0, i1, bottom, top = _span(n, extent[2], extent[3], ylim, margin)
+    else:
+        i0, i1, top, bottom = _span(n, extent[3], extent[2], ylim, margin)
+    return img[i0:i1, j0:j1], [left, right, bottom, top]
+
+
+def _rebin_last(a, n, reduce, dtype, out=None):
+    """Rebin the last axis of `a` to `n` bins of type `dtype`"""
+    N = a.shape[-1]
+    if N % n == 0: # whole pixels per bin
+        b = a.reshape(a.shape[:-1] + (n, N // n))
+        if reduce == 'max':
+            return b.max(-1, out=out)
+        return b.sum(-1, dtype=dtype, out=out)
+
+    x = np.arange(n + 1) * N / n  # bin edges in pixels
+    i = np.floor(x).astype(int)   # pixels at the edges
+    f = x - i                     # fractions of these pixels before the edges
+
+    if reduce == 'max': # any pixel overlapping a bin counts
+        out = np.maximum.reduceat(a, i[:-1], axis=-1, out=out)
+        cut = f[1:-1] > 0 # the pixel at an inner edge overlaps both bins
+        if np.any(cut):
+            out[..., :-1][..., cut] = np.maximum(out[..., :-1][..., cut],
+                                                 a[..., i[1:-1][cut]])
+        return out
+
+    # Whole pixels from i[k] to i[k+1] minus and plus the fractional
+    # pixels at the two edges; reduceat() gives a[i[k]] for empty ranges
+    out = np.add.reduceat(a, i[:-1], axis=-1, dtype=dtype, out=out)
+    out[..., i[1:] == i[:-1]] = 0
+    j = np.minimum(i, N - 1)
+    e = f.astype(dtype) * a[..., j] # f is zero at the last edge
+    out += e[..., 1:]
+    out -= e[..., :-1]
+    return out
+
+
+def rebin(arr, shape, reduce='mean', out=None):
+    """Rebin the last two axes of an array with exact area weighting
+
+    Each output pixel covers `arr.shape[-2] / shape[0]` by
+    `arr.shape[-1] / shape[1]` input pixels, which need not be whole
+    numbers: input pixels on the boundary of an output pixel
+    contribute by the fraction of their area inside it.  Shapes that
+    divide evenly use a plain reshape instead.
+
+    Args:
+        arr (numpy.ndarray): An image or a stack of images, i.e., an
+            array with at least two dimensions.
+        shape (tuple): Shape `(h, w)` of the rebinned image.
+        reduce (string): "mean", "sum", or "max"; "max" takes the
+            maximum of all input pixels overlapping an output pixel.
+        out (numpy.ndarray): Optional output array of shape
+            `arr.shape[:-2] + shape`, which the last reduction writes
+            into directly.
+
+    Returns:
+        numpy.ndarray: The rebinned array, C-contiguous unless `out`
+            is given.  Floating point input keeps its type; "mean"
+            and fractional "sum" of other types are float64, and
+            "max" keeps the type of the input.
+
+    """
+    if reduce not in ('mean', 'sum', 'max'):
+        raise ValueError("unknown reduction \"{}\"".format(reduce))
+    arr  = np.asarray(arr)
+    h, w = shape
+    H, W = arr.shape[-2:]
+
+    if reduce == 'max':
+        dtype = arr.dtype
+    elif arr.dtype.kind == 'f':
+        dtype = arr.dtype
+    elif reduce == 'sum' and H % h == 0 and W % w == 0:
+        dtype = np.zeros(0, arr.dtype).sum().dtype # as numpy's sum()
+    else:
+        dtype = np.dtype(float)
+    if out is None:
+        out = np.empty(arr.shape[:-2] + (h, w), dtype=dtype)
+    elif not np.can_cast(dtype, out.dtype, 'same_kind'):
+        out[...] = rebin(arr, shape, reduce) # e.g., mean into integers
+        return out
+
+    # Rebin the columns first, then the rows straight into `out`
+    a = _rebin_last(arr, w, reduce, dtype)
+    _rebin_last(np.swapaxes(a, -1, -2), h, reduce, dtype,
+                out=np.swapaxes(out, -1, -2))
+    if reduce == 'mean':
+        out /= (H / h) * (W / w)
+    return out
@@ -18,6 +18,10 @@
 
 from __future__ import division
 
+import numpy as np
+
+from matplotlib.ticker import NullLocator
+
 
 def divide(pos, n, inrow=True):
     w = pos.x1 - pos.x0
@@ -32,6 +36,73 @@ def divide(pos, n, inrow=True):
         yield box(i)
 
 
+def grid(pos, n, m, inrow=False, subinrow=True):
+    """Compute the boxes of all cells of a two-level layout in one pass
+
+    This is the vectorized equivalent of dividing `pos` into `n`
+    boxes with `inrow` and then dividing each of them into `m` boxes
+    with `subinrow`, i.e., calling divide() `n+1` times.  The boxes
+    are returned in the same order as the nested divisions.
+
+    Args:
+        pos (matplotlib.transforms.Bbox): Position to be divided.
+        n (int): Number of outer divisions.
+        m (int): Number of inner divisions within each outer box.
+        inrow (bool): Lay out the outer divisions in a row.
+        subinrow (bool): Lay out the inner divisions in a row.
+
+    Returns:
+        numpy.ndarray: An `(n*m, 4)` array of `(x0, y0, w, h)` boxes.
+
+    """
+    k, l = np.divmod(np.arange(n*m), m) # outer and inner indices
+
+    nx, ix = (n, k) if inrow else (1, 0*k)
+    ny, iy = (1, 0*k) if inrow else (n, k)
+    if subinrow:
+        nx, ix = nx*m, ix*m + l
+    else:
+        ny, iy = ny*m, iy*m + l
+
+    w = (pos.x1 - pos.x0) / nx
+    h = (pos.y1 - pos.y0) / ny
+    return np.stack([pos.x0 + ix*w, pos.y0 + iy*h,
+                     np.full(n*m, w), np.full(n*m, h)], axis=-1)
+
+
+def strip(pos, side='right', size=0.04, pad=0.02):
+    """Split a strip, e.g., for a colorbar, off one side of a box
+
+    Args:
+        pos (matplotlib.transforms.Bbox): Position to be split.
+        side (string): "left", "right", "bottom", or "top".
+        size (float): Size of the strip as a fraction of the width
+            (or height for "bottom" and "top") of `pos`.
+        pad (float): Gap between the strip and the rest of the box,
+            in the same unit as `size`.
+
+    Returns:
+        tuple: The `(x0, y0, w, h)` boxes of the rest and the strip.
+
+    """
+    x0, y0 = pos.x0, pos.y0
+    w,  h  = pos.x1 - pos.x0, pos.y1 - pos.y0
+    if side == 'right':
+        d = w * (size + pad)
+        return (x0, y0, w-d, h), (x0+w-w*size, y0, w*size, h)
+    elif side == 'left':
+        d = w * (size + pad)
+        return (x0+d, y0, w-d, h), (x0, y0, w*size, h)
+    elif side == 'top':
+        d = h * (size + pad)
+        return (x0, y0, w, h-d), (x0, y0+h-h*size, w, h*size)
+    elif side == 'bottom':
+        d = h * (size + pad)
+        return (x0, y0+d, w, h-d), (x0, y0, w, h*size)
+    else:
+        raise ValueError("unknown side \"{}\"".format(side))
+
+
 def newaxes(fig, box=(0,0,1,1)):
     """Create an axes with hidden axises"""
     ax = fig.add_axes(box)
@@ -39,6 +110,35 @@ def newaxes(fig, box=(0,0,1,1)):
     return ax
 
 
+def hideticks(ax, x=False, y=False):
+    """Mark the x and/or y ticks of an axes to be dropped by prune()"""
+    ax._ehtplot_hidden = (x, y)
+    if x:
+        ax.tick_params(labelbottom=False, labeltop=False)
+        ax.xaxis.label.set_visible(False)
+    if y:
+        ax.tick_params(labelleft=False, labelright=False)
+        ax.yaxis.label.set_visible(False)
+    prune(ax)
+
+
+def prune(ax):
+    """Drop the ticks of an axes marked by hideticks()
+
+    Hiding tick labels still leaves matplotlib creating, locating, and
+    laying out every tick of every axes.  Replacing the locators by
+    NullLocator removes the ticks altogether, which is what makes a
+    grid of many cells cheap to render.  Visuals may set their own
+    ticks, so this is called again after a cell is drawn.
+
+    """
+    for axis, hidden in zip((ax.xaxis, ax.yaxis),
+                            getattr(ax, '_ehtplot_hidden', (False, False))):
+        if hidden:
+            axis.set_major_locator(NullLocator())
+            axis.set_minor_locator(NullLocator())
+
+
 def getaxes(ax0):
     """Get all axeses, e.g. twinx, from a single axes"""
     axes = [ax0]
@@ -20,9 +20,13 @@ from __future__ import absolute_import
 
 import numpy as np
 
+from matplotlib.cm import ScalarMappable
+
 from ehtplot.visual  import Visual
+from ehtplot.trace   import traced
 from ehtplot.helpers import split_dict, merge_dict
-from ehtplot.layouts import divide, newaxes, getaxes
+from ehtplot.layouts import (divide, grid, strip, newaxes, getaxes,
+                             hideticks, prune)
 
 
 class Panel(object):
@@ -32,13 +36,30 @@ class Panel(object):
     hierarchically organize subpanels and subvisuals, and to manage
     their properties.
 
+    By default, a Panel divides its axes among its subpanels, which
+    recursively divide their own axeses.  Setting the property
+    `layout='grid'` on a Panel whose subpanels are rows (or columns)
+    of equal numbers of subsubpanels instead computes the boxes of
+    all cells in one vectorized pass and creates only the cell
+    axeses.  With `ticklabels='outer'`, the grid also removes the
+    ticks, tick labels, and axis labels of the inner cells, which
+    then skip the tick layout when the figure is rendered.
+
+    Setting `sharecolorbar=True` (or "left", "right", "bottom", or
+    "top"; True means "right") draws a single colorbar for the whole
+    group.  The visuals under the Panel are drawn with
+    `colorbar=False`; the mappables they return must agree in
+    colormap and normalization, otherwise a ValueError is raised.
+
     Attributes:
         _default_kwprops (dict): Default keyworded properties used by
             Panel to create a panel.
         _prop_keys (dict_keys): Keys of _default_kwprops.
 
     """
-    _default_kwprops = {'inrow': True, 'title': None}
+    _default_kwprops = {'inrow': True, 'title': None,
+                        'layout': 'nested', 'ticklabels': 'all',
+                        'sharecolorbar': False}
     _prop_keys = _default_kwprops.keys()
 
 
@@ -75,18 +96,57 @@ class Panel(object):
                 them generated from the `args` argument.
             kwprops (dict): The default keywords used in creating
                 subaxeses when realizing an instance of Panel.
+            dirty (bool): True if the Panel has been updated since it
+                was last realized in retained mode.
 
         """
         self.panels  = panelable
         self.kwprops = merge_dict(self._default_kwprops, kwargs)
+        self.dirty   = True
 
 
     def update(self, **kwargs):
         """Update internal properties"""
         self.kwprops.update(kwargs)
+        self.dirty   = True
         return self
 
 
+    def _isgrid(self, kwprops):
+        """Check if the panel can be laid out as a grid"""
+        if kwprops['layout'] != 'grid' or not self.panels:
+            return False
+        rows = self.panels
+        return (all(isinstance(r, Panel) and r.panels for r in rows) and
+                len(set(len(r.panels)        for r in rows)) == 1 and
+                len(set(r.kwprops['inrow'] for r in rows)) == 1 and
+                all(isinstance(c, Panel) for r in rows for c in r.panels))
+
+
+    def _cells(self, kwprops):
+        """List the nodes that get the subaxeses from __call__()"""
+        if self._isgrid(kwprops):
+            return [c for r in self.panels for c in r.panels]
+        else:
+            return self.panels
+
+
+    def _grid(self, ax, kwprops):
+        """Generate the cell axeses of a grid layout"""
+        pos   = ax.get_position()
+        boxes = grid(pos, len(self.panels), len(self.panels[0].panels),
+                     inrow=kwprops['inrow'],
+                     subinrow=self.panels[0].kwprops['inrow'])
+        outer = kwprops['ticklabels'] == 'outer'
+
+        for b in boxes:
+            subax = newaxes(ax.figure, tuple(b))
+            if outer:
+                hideticks(subax, x=not np.isclose(b[1], pos.y0),
+                                 y=not np.isclose(b[0], pos.x0))
+            yield subax
+
+
     def __call__(self, ax, **kwargs):
         """Panel realizer
 
@@ -94,7 +154,8 @@ class Panel(object):
         combining the saved and new arguments.  It accepts the same
         keyworded arguments as Visual.__init__().  Therefore, its
         argument list matches Visual.__init__() with `panelable`
-        replaced by `ax`.
+        replaced by `ax`.  The generated axeses match the nodes
+        listed by _cells().
 
         Args:
             ax (matplotlib.axis.Axes): A matplotlib Axes for Panel's
@@ -105,6 +166,11 @@ class Panel(object):
         """
         kwprops = merge_dict(self.kwprops, kwargs)
 
+        if self._isgrid(kwprops):
+            for subax in self._grid(ax, kwprops):
+                yield subax
+            return
+
         box = divide(ax.get_position(),
                      list(map(type, self.panels)).count(Panel),
                      inrow=kwprops['inrow'])
@@ -118,6 +184,48 @@ class Panel(object):
                 yield ax
 
 
+    def _colorbar_axes(self, ax, kwprops):
+        """Split the axes of the shared colorbar off `ax`, or return None"""
+        side = kwprops['sharecolorbar']
+        if side is False:
+            return None
+        box, cbox = strip(ax.get_position(), 'right' if side is True else side)
+        ax.set_position(box)
+        return newaxes(ax.figure, cbox)
+
+
+    def _colorbar(self, cax, kwprops, results):
+        """Draw the shared colorbar from the results of the subnodes"""
+        def mappables(r):
+            if isinstance(r, (list, tuple)):
+                return [m for x in r for m in mappables(x)]
+            return [r] if isinstance(r, ScalarMappable) else []
+
+        ms = mappables(results)
+        if not ms:
+            return None
+        m0 = ms[0]
+        for m in ms[1:]:
+            if (m.get_cmap().name != m0.get_cmap().name or
+                type(m.norm) is not type(m0.norm) or
+                not np.allclose([m.norm.vmin, m.norm.vmax],
+                                [m0.norm.vmin, m0.norm.vmax])):
+                raise ValueError("visuals sharing a colorbar must have "
+                                 "the same colormap and normalization")
+
+        side = kwprops['sharecolorbar']
+        side = 'right' if side is True else side
+        cax.axis('on')
+        if side == 'top' or side == 'bottom':
+            cbar = cax.figure.colorbar(m0, cax=cax, orientation='horizontal')
+            cbar.ax.xaxis.set_ticks_position(side)
+        else:
+            cbar = cax.figure.colorbar(m0, cax=cax, orientation='vertical')
+            cbar.ax.yaxis.set_ticks_position(side)
+        return cbar
+
+
+    @traced(lambda self: 'Panel', 'panel')
     def draw(self, ax, *args, **kwargs):
         """Panel drawer/renderer
 
@@ -144,5 +252,13 @@ class Panel(object):
         """
         kwargs, kwprops = split_dict(kwargs, self._prop_keys)
         kwprops = merge_dict(self.kwprops, kwprops)
-        return [p.draw(a, *args, **kwargs)
-                for p, a in zip(self.panels, self(ax, **kwprops))]
+        cax     = self._colorbar_axes(ax, kwprops)
+        if cax is not None:
+            kwargs = merge_dict(kwargs, {'colorbar': False})
+        out = []
+        for p, a in zip(self._cells(kwprops), self(ax, **kwprops)):
+            out.append(p.draw(a, *args, **kwargs))
+            prune(a)
+        if cax is not None:
+            self._colorbar(cax, kwprops, out)
+        return out
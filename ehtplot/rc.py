@@ -0,0 +1,121 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Per-thread matplotlib rc parameters
+
+matplotlib keeps its rc parameters in the single, process-wide
+`matplotlib.rcParams`, which is read both when artists are created
+and when they are rendered.  This module turns it into a per-thread
+view: inside `using(rc)`, the calling thread reads and writes the
+parameters in `rc` and falls back to the global ones for all other
+keys, while other threads keep seeing their own values.  Figures in
+different threads can therefore be built and rendered concurrently
+with different styles:
+
+    with using(style_rc('ehtplot')):
+        fig = matplotlib.figure.Figure()
+        ...                     # build and render with the style
+
+Code running inside `using()` must not call `matplotlib.rcdefaults()`
+or `matplotlib.rc_context()`, which bypass the view and change the
+global parameters; set `matplotlib.rcParams[key]` or use a nested
+`using()` instead.
+
+"""
+
+from __future__ import absolute_import
+
+import threading
+
+from contextlib import contextmanager
+
+import matplotlib as mpl
+import matplotlib.style
+
+from matplotlib.style.core import STYLE_BLACKLIST
+
+
+_local  = threading.local()
+_styles = {} # cached parameters of the styles
+_lock   = threading.Lock()
+
+
+class _ThreadRcParams(mpl.RcParams):
+    """RcParams whose reads and writes go to the rc of the thread, if any
+
+    All reading and writing of RcParams, including `get()`,
+    `update()`, and iteration over items, go through `_get()` and
+    `_set()`.
+
+    """
+    def _get(self, key):
+        rc = getattr(_local, 'rc', None)
+        if rc is not None and key in rc:
+            return rc[key]
+        return dict.__getitem__(self, key)
+
+    def _set(self, key, val):
+        rc = getattr(_local, 'rc', None)
+        if rc is not None:
+            rc[key] = val
+        else:
+            dict.__setitem__(self, key, val)
+
+
+mpl.rcParams.__class__ = _ThreadRcParams
+
+
+@contextmanager
+def using(rc):
+    """Context in which the calling thread sees `rc` on top of its rc
+
+    Changes made to the parameters inside the context are discarded
+    on exit.
+
+    """
+    prev = getattr(_local, 'rc', None)
+    new  = dict(prev) if prev is not None else {}
+    new.update(rc)
+    _local.rc = new
+    try:
+        yield
+    finally:
+        _local.rc = prev
+
+
+def style_rc(style):
+    """The rc parameters of matplotlib's defaults updated by `style`
+
+    This matches `matplotlib.rcdefaults()` followed by
+    `matplotlib.style.use(style)` without touching the global
+    parameters.  Keys that styles cannot set, e.g., "backend", are
+    left out so they follow the global parameters.
+
+    Returns:
+        dict: The parameters; callers must not modify it.
+
+    """
+    key = repr(style)
+    with _lock:
+        if key not in _styles:
+            rc = {k: v for k, v in dict.items(mpl.rcParamsDefault)
+                  if k not in STYLE_BLACKLIST}
+            with using(rc):
+                mpl.style.use(style)
+                _styles[key] = _local.rc
+        return _styles[key]
@@ -0,0 +1,284 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+
+import numpy as np
+
+from matplotlib.transforms import Bbox
+
+from ehtplot.panel   import Panel
+from ehtplot.helpers import split_dict, merge_dict
+from ehtplot.layouts import prune
+
+
+class Record(object):
+    """Book keeping of a realized Panel or Visual
+
+    Attributes:
+        node (Panel or Visual): The realized ehtplot node.
+        ax (matplotlib.axes.Axes): The axes the node is realized on.
+        position (matplotlib.transforms.Bbox): The original position
+            of `ax`, which is restored before a redraw.
+        children (list of Record): Records of the subpanels and
+            subvisuals of a Panel.
+        extras (list of matplotlib.axes.Axes): Axeses, e.g.,
+            colorbars and twinx, created by a Visual, or the shared
+            colorbar of a Panel.
+        result: The return value of a Visual, or the list of the
+            results of the children of a Panel.
+
+    """
+    def __init__(self, node, ax):
+        self.node     = node
+        self.ax       = ax
+        self.position = ax.get_position(original=True)
+        self.children = []
+        self.extras   = []
+        self.result   = None
+
+
+    def axes(self):
+        """All axeses created when realizing this node"""
+        out = list(self.extras)
+        for c in self.children:
+            if c.ax is not self.ax:
+                out.append(c.ax)
+            out += c.axes()
+        return out
+
+
+    def nodes(self):
+        """All ehtplot nodes under, and including, this node"""
+        out = [self.node]
+        for c in self.children:
+            out += c.nodes()
+        return out
+
+
+def _blank(a):
+    """Check if the axes `a` draws nothing, e.g., a container of subpanels"""
+    return not (a.axison or a.images or a.lines or a.collections or
+                a.patches or a.texts or a.artists or a.tables or
+                a.child_axes or a.legend_ is not None or
+                a.title.get_text() or a._left_title.get_text() or
+                a._right_title.get_text())
+
+
+class Retained(object):
+    """Retained-mode realization of a Panel/Visual tree
+
+    A Retained instance keeps a map from each Panel and Visual in a
+    tree to the matplotlib axeses and artists it created.  When nodes
+    are modified with `Panel.update()` or `Visual.update()`, they are
+    marked dirty.  `redraw()` then re-executes only the affected
+    visuals and blits the damaged region of the canvas, instead of
+    rebuilding the whole figure.
+
+    The unit of a redraw is an axes: if a Visual is dirty, all
+    Visuals sharing its axes are re-executed.  If a Panel is dirty,
+    its whole subtree is rebuilt because its layout may change.  A
+    Panel with a shared colorbar is also rebuilt if any node under it
+    is dirty because the colorbar depends on all of them.
+
+    """
+    def __init__(self, fig, ax, root, *args, **kwargs):
+        """Retained initializer
+
+        Args:
+            fig (matplotlib.figure.Figure): The matplotlib Figure to
+                realize on.
+            ax (matplotlib.axes.Axes): The root axes of `fig`.
+            root (Panel or Visual): The root node of the tree.
+            *args (tuple): Variable length argument list that is
+                passed to the visuals on every (re)draw.
+            **kwargs (dict): Arbitrary keyworded arguments that are
+                passed to the panels and visuals on every (re)draw.
+
+        """
+        self.fig    = fig
+        self.args   = args
+        self.kwargs = kwargs
+
+        self._background = None
+        if getattr(fig.canvas, 'supports_blit', False):
+            fig.canvas.draw()
+            self._background = fig.canvas.copy_from_bbox(fig.bbox)
+            self._extents    = fig.bbox.extents
+        self._bboxes  = {}
+        self._damaged = []
+
+        self.root = self._realize(root, ax, args, kwargs)
+        for node in self.root.nodes():
+            node.dirty = False
+
+
+    def _realize(self, node, ax, args, kwargs):
+        """Recursively realize a node and record what it creates"""
+        rec = Record(node, ax)
+        if isinstance(node, Panel):
+            kwargs, kwprops = split_dict(kwargs, node._prop_keys)
+            kwprops = merge_dict(node.kwprops, kwprops)
+            cax     = node._colorbar_axes(ax, kwprops)
+            if cax is not None:
+                kwargs = merge_dict(kwargs, {'colorbar': False})
+            for p, a in zip(node._cells(kwprops), node(ax, **kwprops)):
+                rec.children.append(self._realize(p, a, args, kwargs))
+            rec.result = [c.result for c in rec.children]
+            if cax is not None:
+                rec.extras = [cax]
+                node._colorbar(cax, kwprops, rec.result)
+        else:
+            before = set(self.fig.axes)
+            rec.result = node.draw(ax, *args, **kwargs)
+            rec.extras = [a for a in self.fig.axes if a not in before]
+        prune(ax) # visuals may have set ticks on a cell of a grid
+        return rec
+
+
+    def _bbox(self, a):
+        """Cached tight bounding box of an axes in display coordinates"""
+        if a not in self._bboxes:
+            self._bboxes[a] = a.get_tightbbox(self.fig.canvas.get_renderer())
+        return self._bboxes[a]
+
+
+    def _damage(self, axes):
+        """Mark the current areas of `axes` as damaged"""
+        if self._background is not None:
+            self._damaged += [self._bbox(a) for a in axes]
+        for a in axes:
+            self._bboxes.pop(a, None)
+
+
+    def _reset(self, rec, axes):
+        """Remove `axes` and restore the axes of `rec` to pristine"""
+        self._damage([rec.ax] + axes)
+        for a in axes:
+            self.fig.delaxes(a)
+        rec.ax.cla()
+        rec.ax.set_axes_locator(None)
+        rec.ax.set_position(rec.position)
+        rec.ax.axis('off')
+
+
+    def _refresh(self, rec, kwargs):
+        """Redraw dirty nodes under `rec`; return the new axeses"""
+        node = rec.node
+        if not isinstance(node, Panel):
+            if not node.dirty:
+                return []
+            self._reset(rec, rec.extras)
+            rec.ax.axis('on')
+            new = self._realize(node, rec.ax, self.args, kwargs)
+            rec.extras, rec.result = new.extras, new.result
+            self.count += 1
+            return [rec.ax] + rec.extras
+
+        kwargs, kwprops = split_dict(kwargs, node._prop_keys)
+        shared = merge_dict(node.kwprops, kwprops)['sharecolorbar']
+        if node.dirty or (shared is not False and
+                          any(n.dirty for n in rec.nodes())):
+            # layout or the shared colorbar may change; rebuild the subtree
+            self._reset(rec, rec.axes())
+            new = self._realize(node, rec.ax, self.args,
+                                merge_dict(kwargs, kwprops))
+            rec.children = new.children
+            rec.extras   = new.extras
+            rec.result   = new.result
+            self.count  += sum(1 for n in new.nodes()
+                               if not isinstance(n, Panel))
+            return [rec.ax] + rec.axes()
+
+        touched = []
+        visuals = [c for c in rec.children if c.ax is rec.ax]
+        if any(c.node.dirty for c in visuals):
+            self._reset(rec, sum((c.extras for c in visuals), []))
+            for c in visuals:
+                rec.ax.axis('on')
+                new = self._realize(c.node, rec.ax, self.args, kwargs)
+                c.extras, c.result = new.extras, new.result
+                touched += c.extras
+            touched.append(rec.ax)
+            self.count += len(visuals)
+
+        for c in rec.children:
+            if c.ax is not rec.ax:
+                touched += self._refresh(c, kwargs)
+        return touched
+
+
+    def _blit(self, touched):
+        """Blit the canvas region damaged by redrawing `touched`"""
+        canvas = self.fig.canvas
+        if (self._background is None or
+            tuple(self._extents) != tuple(self.fig.bbox.extents)):
+            canvas.draw_idle() # cannot blit; fall back to a full draw
+            return
+
+        boxes = self._damaged + [self._bbox(a) for a in touched]
+        boxes = [b for b in boxes if b is not None]
+        if not boxes:
+            return
+        W, H = canvas.get_width_height()
+        x0, y0, x1, y1 = Bbox.union(boxes).extents
+        x0, y0 = max(int(np.floor(x0)), 0), max(int(np.floor(y0)), 0)
+        x1, y1 = min(int(np.ceil (x1)), W), min(int(np.ceil (y1)), H)
+        if x0 >= x1 or y0 >= y1:
+            return
+        region = Bbox([[x0, y0], [x1, y1]])
+
+        def restore(saved, x0, y0, x1, y1): # buffer rows run downwards
+            if x0 < x1 and y0 < y1:
+                canvas.restore_region(saved, bbox=(x0, H-y1, x1, H-y0),
+                                      xy=(0, 0))
+
+        # Redraw every axes that overlaps the region on the restored
+        # background, then put back the pixels outside the region,
+        # which these axes may have drawn over.  Blank axes, e.g.,
+        # the containers of subpanels, draw nothing and are skipped.
+        redraw = [a for a in self.fig.axes if not _blank(a) and
+                  self._bbox(a) is not None and
+                  self._bbox(a).overlaps(region)]
+        saved  = canvas.copy_from_bbox(self.fig.bbox)
+        restore(self._background, x0, y0, x1, y1)
+        order = self.fig.axes.index
+        for a in sorted(redraw, key=lambda a: (a.get_zorder(), order(a))):
+            self.fig.draw_artist(a)
+        restore(saved, 0,  0,  W,  y0)
+        restore(saved, 0,  y1, W,  H)
+        restore(saved, 0,  y0, x0, y1)
+        restore(saved, x1, y0, W,  y1)
+        canvas.blit(region)
+
+
+    def redraw(self):
+        """Re-execute the dirty nodes and blit the result
+
+        Returns:
+            int: The number of visuals re-executed.
+
+        """
+        self.count    = 0
+        self._damaged = []
+        touched = self._refresh(self.root, self.kwargs)
+        for node in self.root.nodes():
+            node.dirty = False
+        if self.count:
+            self._blit(touched)
+        return self.count
@@ -0,0 +1,175 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compact serialization of ehtplot Figure/Panel/Visual trees
+
+Figure, Panel, and Visual instances can be pickled directly; Visuals
+loaded from `Visual.paths` are pickled by their registered names and
+reloaded on the receiving side.  The helpers in this module further
+use pickle protocol 5 to keep large numpy arrays out of band, so a
+tree can be shipped to worker processes as a small pickle plus a list
+of raw buffers, or written once to a file that workers map into
+memory instead of receiving the data:
+
+    data, buffers = dumps(fig)   # send `data` and `buffers`
+    fig = loads(data, buffers)   # arrays are views of `buffers`
+
+    dump(fig, "tree.ehtplot")    # send only the file name
+    fig = load("tree.ehtplot")   # arrays are views of the mapped file
+
+With an `ehtplot.store.ArrayStore`, large arrays are instead placed
+in shared memory once, deduplicated by content, and the pickle only
+carries their handles:
+
+    data, _ = dumps(fig, store=store)
+    fig = loads(data)            # arrays are views of shared memory
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import mmap
+import pickle
+import struct
+
+from io import BytesIO
+
+import numpy as np
+
+from ehtplot.store import attach
+
+if pickle.HIGHEST_PROTOCOL < 5:
+    raise ImportError("ehtplot.serial requires pickle protocol 5")
+
+
+_align = 64 # alignment of the buffers in a file, in bytes
+_magic = b"EHTPLOT1"
+_plain = (np.ndarray, np.memmap) # subclasses, e.g. masked arrays, carry state
+
+
+class _Pickler(pickle.Pickler):
+    """Pickler that replaces large arrays by handles into a store, if any
+
+    Memory maps, e.g., the images of a bundle, are pickled as the
+    plain arrays they view; otherwise numpy would copy them in band.
+
+    """
+    def __init__(self, file, store, threshold, **kwargs):
+        pickle.Pickler.__init__(self, file, **kwargs)
+        self.store     = store
+        self.threshold = threshold
+        self.memo_ids  = {} # id -> (array, handle); arrays are kept alive
+        self.proto     = kwargs.get('protocol', pickle.DEFAULT_PROTOCOL)
+
+    def persistent_id(self, obj):
+        if (self.store is None or type(obj) not in _plain or
+            obj.dtype.hasobject or obj.nbytes < self.threshold):
+            return None
+        if id(obj) not in self.memo_ids:
+            self.memo_ids[id(obj)] = (obj, self.store.put(obj))
+        return self.memo_ids[id(obj)][1]
+
+    def reducer_override(self, obj):
+        if type(obj) is np.memmap:
+            return np.asarray(obj).__reduce_ex__(self.proto)
+        return NotImplemented
+
+
+class _Unpickler(pickle.Unpickler):
+    """Unpickler that attaches arrays referenced by handles"""
+    def persistent_load(self, pid):
+        return attach(pid)
+
+
+def dumps(obj, threshold=65536, store=None):
+    """Pickle `obj` keeping large buffers out of band
+
+    Args:
+        obj (object): The object to pickle, e.g., an ehtplot Figure.
+        threshold (int): Buffers, e.g., numpy arrays, of at least
+            this many bytes are kept out of band.
+        store (ehtplot.store.ArrayStore): If given, large arrays are
+            put in the store and only their handles are pickled.
+
+    Returns:
+        tuple: The pickle as bytes and the list of out-of-band buffers
+            as memoryviews.
+
+    """
+    buffers = []
+    def callback(buf):
+        raw = buf.raw()
+        if raw.nbytes < threshold:
+            return True # serialize in band
+        buffers.append(raw)
+        return False
+    f = BytesIO()
+    _Pickler(f, store, threshold,
+             protocol=5, buffer_callback=callback).dump(obj)
+    return f.getvalue(), buffers
+
+
+def loads(data, buffers=()):
+    """Unpickle an object created by dumps()
+
+    The arrays in the returned object share memory with `buffers`
+    or, for arrays put in an ArrayStore, with the store.
+
+    """
+    return _Unpickler(BytesIO(data), buffers=buffers).load()
+
+
+def dump(obj, file, threshold=65536):
+    """Write `obj` to `file` with its large buffers aligned for mapping
+
+    The file holds the aligned out-of-band buffers followed by the
+    pickle, the offsets of the buffers, and a fixed-size footer.
+
+    """
+    data, buffers = dumps(obj, threshold=threshold)
+    spans = []
+    with open(file, 'wb') as f:
+        for buf in buffers:
+            f.write(b"\0" * (-f.tell() % _align))
+            spans.append((f.tell(), buf.nbytes))
+            f.write(buf)
+        meta = pickle.dumps((data, spans), protocol=5)
+        f.write(meta)
+        f.write(struct.pack('<Q', len(meta)) + _magic)
+
+
+def load(file):
+    """Read an object written by dump()
+
+    The file is mapped copy-on-write: arrays in the returned object
+    are views of the mapped file, pages are only read when they are
+    accessed, and modifying an array never changes the file.
+
+    """
+    with open(file, 'rb') as f:
+        f.seek(-16, os.SEEK_END)
+        size, magic = struct.unpack('<Q8s', f.read(16))
+        if magic != _magic:
+            raise ValueError("\"{}\" is not an ehtplot tree".format(file))
+        f.seek(-16 - size, os.SEEK_END)
+        data, spans = pickle.loads(f.read(size))
+        if not spans:
+            return loads(data)
+        m = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+    return loads(data, [m[o:o+n] for o, n in spans])
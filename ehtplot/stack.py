@@ -0,0 +1,225 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import division
+
+import numpy as np
+
+
+class QuantileSketch(object):
+    """Bounded-memory streaming quantile sketch
+
+    A simplified KLL sketch: values are kept in levels of at most `k`
+    sorted samples, where a sample at level h stands for 2**h input
+    values.  When a level overflows, it is sorted and every other
+    sample, starting at a random offset, is promoted to the next
+    level.  The memory is O(k log(n/k)) for n values, and the rank
+    error of a quantile is a small multiple of log(n/k) / k.
+
+    """
+    def __init__(self, k=4096, seed=0):
+        self.k      = k
+        self.n      = 0
+        self.levels = [np.empty(0)]
+        self._rng   = np.random.RandomState(seed)
+
+
+    def update(self, values):
+        """Add the finite elements of `values` to the sketch"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        self.n += values.size
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            if self.levels[h].size > self.k:
+                buf = np.sort(self.levels[h])
+                odd = buf.size % 2 # keep one sample to preserve the weight
+                up  = buf[odd:][self._rng.randint(2)::2]
+                self.levels[h] = buf[:odd]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h+1] = np.concatenate([self.levels[h+1], up])
+            h += 1
+
+
+    def quantile(self, q):
+        """Approximate `q`-th quantile(s), q in [0, 1]"""
+        values  = np.concatenate(self.levels)
+        if not values.size:
+            return np.full(np.shape(q), np.nan)
+        weights = np.concatenate([np.full(l.size, 2.0**h)
+                                  for h, l in enumerate(self.levels)])
+        order   = np.argsort(values)
+        values  = values[order]
+        cum     = np.cumsum(weights[order])
+        i = np.searchsorted(cum, np.asarray(q) * cum[-1], side='left')
+        return values[np.minimum(i, values.size - 1)]
+
+
+class Stack(object):
+    """Out-of-core stack of image frames
+
+    A Stack wraps either a (T, H, W) array-like, e.g., a memory-mapped
+    numpy array from `np.load(..., mmap_mode='r')`, or an iterator of
+    2D frames, e.g., an ehtplot Bundle.  The global statistics of all
+    frames are computed in one streaming pass that holds one frame at
+    a time, and only the selected frames are ever loaded for drawing.
+
+    When passed to `ehtplot.plot()`, a Stack expands into its selected
+    frames, drawn with a shared normalization: the maximum of the
+    whole stack maps to 1 and, with `percentiles`, the color limits
+    are set by the global percentiles.
+
+    Example:
+        movie = np.load("movie.npy", mmap_mode='r')
+        fig   = eht.plot('image', Stack(movie, frames=[0, 100, 200],
+                                        percentiles=(0.5, 99.5)))
+
+    """
+    def __init__(self, source, frames=None, percentiles=None, k=4096):
+        """Stack initializer
+
+        Args:
+            source (array-like or iterator): A (T, H, W) array-like,
+                indexed one frame at a time, or an iterator of 2D
+                frames, which is consumed by the statistics pass.
+            frames (list of int): Indices of the frames to draw; all
+                frames of an array-like if None.  Required for
+                iterators, whose selected frames are kept in memory
+                during the statistics pass.
+            percentiles (tuple): Lower and upper percentiles, in
+                [0, 100], used as the shared color limits; the limits
+                are [0, max] for linear and [min>0, max] for log
+                scales if None.
+            k (int): Size of the levels of the quantile sketch.
+
+        """
+        self.indexed = (hasattr(source, 'shape') and
+                        hasattr(source, '__getitem__'))
+        if not self.indexed and frames is None:
+            raise ValueError("frames must be selected for an iterator source")
+        self.source      = source
+        self.selected    = (list(range(source.shape[0])) if frames is None
+                            else list(frames))
+        self.percentiles = percentiles
+        self.k           = k
+        self._stats      = None
+        self._kept       = {}
+
+
+    def __len__(self):
+        if self.indexed:
+            return self.source.shape[0]
+        return self.stats()['count']
+
+
+    def _frames(self):
+        if self.indexed:
+            for i in range(self.source.shape[0]):
+                yield i, self.source[i]
+        else:
+            selected = set(self.selected)
+            for i, f in enumerate(self.source):
+                if i in selected:
+                    self._kept[i] = np.array(f) # the iterator may reuse f
+                yield i, f
+
+
+    def stats(self):
+        """Global statistics of all frames, computed once in a streaming pass
+
+        Returns:
+            dict: "count" (number of frames), "min", "max", "minpos"
+                (smallest positive value), "mean", "frame_max" (per
+                frame maxima), and "sketch" (a QuantileSketch).
+
+        """
+        if self._stats is not None:
+            return self._stats
+
+        sketch = QuantileSketch(self.k)
+        lo, hi, minpos, total, n, fmax = np.inf, -np.inf, np.inf, 0.0, 0, []
+        for _, f in self._frames():
+            f = np.asarray(f)
+            fmax.append(np.max(f))
+            lo     = min(lo, np.min(f))
+            hi     = max(hi, fmax[-1])
+            minpos = min(minpos, np.min(f, where=f > 0, initial=np.inf))
+            total += np.sum(f, dtype=float)
+            n     += f.size
+            sketch.update(f)
+        self._stats = {'count': len(fmax), 'min': lo, 'max': hi,
+                       'minpos': minpos, 'mean': total / n if n else np.nan,
+                       'frame_max': np.array(fmax), 'sketch': sketch}
+        return self._stats
+
+
+    def percentile(self, p):
+        """Approximate global percentile(s), p in [0, 100]"""
+        return self.stats()['sketch'].quantile(np.asarray(p) / 100)
+
+
+    def frames(self):
+        """The selected frames; views of the source if it is indexed"""
+        if self.indexed:
+            return [self.source[i] for i in self.selected]
+        self.stats()
+        return [self._kept[i] for i in self.selected]
+
+
+    def kwargs(self, norm=1, scale='lin'):
+        """Per-frame keyworded arguments of visualize_image()
+
+        The arguments scale every selected frame so that the maximum
+        of the whole stack maps to `norm` (or leave the frames in
+        their own units if `norm` is False or the maximum is not
+        positive) and set the shared `vlim`.  Frames whose maximum is
+        zero cannot be scaled by visualize_image() and are left in
+        their own units.  On a log scale, the lower limit is at least
+        the smallest positive value of the stack.
+
+        """
+        s = self.stats()
+        f = norm / s['max'] if norm is not False and s['max'] > 0 else 1
+        if self.percentiles is not None:
+            vlim = f * self.percentile(self.percentiles)
+        elif scale == 'log':
+            vlim = f * np.array([s['minpos'], s['max']])
+        else:
+            vlim = f * np.array([0, s['max']])
+        if scale == 'log':
+            if np.isfinite(s['minpos']):
+                lo   = max(vlim[0], f * s['minpos'])
+                vlim = (lo, max(vlim[1], lo))
+            else: # nothing positive to show
+                vlim = (1, 1)
+        # Tuples are not broadcast by plot()
+        vlim = tuple(float(v) for v in vlim)
+
+        if norm is False or s['max'] <= 0:
+            return {'vlim': vlim}
+        fmax = s['frame_max'][self.selected]
+        return {'norm': [False if m == 0 else f * m for m in fmax],
+                'vlim': vlim}
@@ -0,0 +1,244 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Shared array store for multi-process rendering
+
+An ArrayStore places numpy arrays in memory shared between processes,
+either memory-mapped files (by default in /dev/shm when it exists)
+or `multiprocessing.shared_memory` blocks, and returns small picklable
+Handles in their place.  Identical arrays are stored only once: they
+are deduplicated by a digest of their contents.  Any process can turn
+a Handle back into an array with attach(); the mapping is cached while
+the array is in use, so each block is mapped at most once per process
+at a time, and unmapped once all of its arrays are freed.
+
+Together with `ehtplot.serial.dumps(obj, store=...)`, large arrays in
+an ehtplot tree are replaced by Handles, so workers receive only a
+small pickle and share one copy of the data:
+
+    with ArrayStore() as store:
+        data, _ = serial.dumps(fig, store=store)
+        pool.map(render, [data] * n) # render() calls serial.loads(data)
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import mmap
+import uuid
+import weakref
+import hashlib
+import tempfile
+import threading
+
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError: # python < 3.8
+    shared_memory = None
+
+
+Handle = namedtuple('Handle', ['kind', 'name', 'dtype', 'shape', 'digest'])
+Handle.__doc__ = "Picklable reference to an array in an ArrayStore"
+
+
+_attached = weakref.WeakValueDictionary() # name -> array mapped here
+_released = [] # shared memory blocks whose arrays were freed
+_lock     = threading.Lock()
+
+
+def digest(arr):
+    """Digest of the contents, dtype, and shape of `arr`"""
+    arr = np.ascontiguousarray(arr)
+    h   = hashlib.blake2b(digest_size=16)
+    h.update(str((arr.dtype.str, arr.shape)).encode())
+    h.update(arr.data if arr.size else b"")
+    return h.hexdigest()
+
+
+def _default_dir():
+    """Directory of memory-mapped files; RAM-backed if possible"""
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _map(path, access):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=access)
+
+
+def _shm(name):
+    """Open an existing shared memory block without owning it
+
+    A block opened with `SharedMemory(name)` before python 3.13 is
+    registered with the resource tracker of the process, which
+    unlinks it when the process exits, i.e., it would be removed
+    from under the store and all other processes.
+
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError: # python < 3.13 always tracks
+        block = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(block._name, 'shared_memory')
+        return block
+
+
+def _close(block):
+    _released.append(block) # the freed array still exports the buffer
+
+
+def attach(handle):
+    """Return the array referenced by `handle`
+
+    Arrays in "file" blocks are mapped copy-on-write: they are
+    writable, but modifications stay private to the process.  Arrays
+    in "shm" blocks are read-only because writes would be visible to
+    every process.  The block is unmapped when the array and all of
+    its views are freed.
+
+    """
+    with _lock:
+        while _released:
+            _released.pop().close()
+
+        arr = _attached.get(handle.name)
+        if arr is not None:
+            return arr
+
+        block = None
+        if handle.kind == 'file':
+            buf = _map(handle.name, mmap.ACCESS_COPY)
+        elif handle.kind == 'shm':
+            path = os.path.join("/dev/shm", handle.name.lstrip('/'))
+            if os.path.exists(path): # map it directly, bypassing the tracker
+                buf = _map(path, mmap.ACCESS_READ)
+            else:
+                block = _shm(handle.name)
+                buf   = block.buf
+        else:
+            raise ValueError("unknown kind \"{}\"".format(handle.kind))
+
+        # The array keeps a mapping alive; a SharedMemory block has to
+        # outlive its array, so it is closed on a later attach()
+        arr = np.ndarray(handle.shape, dtype=handle.dtype, buffer=buf)
+        arr.flags.writeable = handle.kind == 'file'
+        if block is not None:
+            weakref.finalize(arr, _close, block)
+        _attached[handle.name] = arr
+        return arr
+
+
+class ArrayStore(object):
+    """Content-addressed store of arrays shared between processes
+
+    The store owns its blocks: close() (or leaving the `with` block)
+    removes them.  Processes that attached a block keep their mapping
+    until they free its arrays.
+
+    Attributes:
+        kind (string): "file" for memory-mapped files or "shm" for
+            `multiprocessing.shared_memory` blocks.
+        dir (string): Directory of the memory-mapped files.
+        handles (dict): Map from digest to Handle of stored arrays.
+
+    """
+    def __init__(self, kind='file', dir=None):
+        """ArrayStore initializer
+
+        Args:
+            kind (string): "file" or "shm".
+            dir (string): Directory of the memory-mapped files; use
+                /dev/shm, or the temporary directory if it does not
+                exist, when None.
+
+        """
+        if kind == 'shm' and shared_memory is None:
+            raise ValueError("shared memory requires python >= 3.8")
+        if kind not in ('file', 'shm'):
+            raise ValueError("unknown kind \"{}\"".format(kind))
+        self.kind    = kind
+        self.dir     = dir if dir is not None else _default_dir()
+        self.handles = {}
+        self._blocks = []
+        self._lock   = threading.Lock()
+
+
+    def __len__(self):
+        return len(self.handles)
+
+
+    @property
+    def nbytes(self):
+        """Total number of bytes stored"""
+        return sum(int(np.prod(h.shape)) * np.dtype(h.dtype).itemsize
+                   for h in self.handles.values())
+
+
+    def put(self, arr):
+        """Store `arr` unless an identical array is stored; return its Handle"""
+        arr = np.ascontiguousarray(arr)
+        key = digest(arr)
+        with self._lock:
+            if key in self.handles:
+                return self.handles[key]
+
+            name = "ehtplot-" + uuid.uuid4().hex
+            size = max(arr.nbytes, 1)
+            if self.kind == 'file':
+                name = os.path.join(self.dir, name)
+                with open(name, 'wb') as f:
+                    f.write(arr.data if arr.size else b"\0")
+                self._blocks.append(name)
+            else:
+                block = shared_memory.SharedMemory(name=name, create=True,
+                                                   size=size)
+                np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+                self._blocks.append(block)
+
+            handle = Handle(self.kind, name, arr.dtype.str, arr.shape, key)
+            self.handles[key] = handle
+            return handle
+
+
+    def close(self):
+        """Remove all blocks of the store"""
+        with self._lock:
+            for block in self._blocks:
+                if self.kind == 'file':
+                    try:
+                        os.remove(block)
+                    except OSError:
+                        pass
+                else:
+                    block.close()
+                    block.unlink()
+            self._blocks  = []
+            self.handles = {}
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+        return False
@@ -0,0 +1,245 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import division
+
+import os
+import json
+import threading
+import tracemalloc
+
+from functools import wraps
+from timeit    import default_timer as timer
+
+
+_tracer = None # the active Tracer; None when tracing is disabled
+
+
+class _Null(object):
+    """A do-nothing context manager returned when tracing is disabled"""
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        return False
+
+_null = _Null()
+
+
+def span(name, cat='ehtplot', node=False):
+    """Time a block of code if tracing is enabled
+
+    Args:
+        name (string): Name of the span, e.g., "imshow".
+        cat (string): Category of the span, e.g., "visual".
+        node (bool): True if the span is a node of the ehtplot tree,
+            in which case it is also summarized by its tree path.
+
+    Returns:
+        A context manager.
+
+    """
+    if _tracer is None:
+        return _null
+    return _Span(_tracer, name, cat, node)
+
+
+def traced(name, cat='ehtplot', node=True):
+    """Decorate a method so its calls are spans
+
+    Args:
+        name (callable): Function that takes `self` and returns the
+            name of the span.
+        cat (string): Category of the span.
+        node (bool): True if the method draws a node of the tree.
+
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if _tracer is None: # the only cost when tracing is disabled
+                return func(self, *args, **kwargs)
+            with _Span(_tracer, name(self), cat, node):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _Span(object):
+    """A single timed block"""
+    def __init__(self, tracer, name, cat, node):
+        self.tracer = tracer
+        self.name   = name
+        self.cat    = cat
+        self.node   = node
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        parent, count = stack[-1] if stack else ((), [0])
+        if self.node: # only tree nodes extend the path
+            self.path = parent + (count[0],)
+            count[0] += 1
+            stack.append((self.path, [0]))
+        else:
+            self.path = parent
+
+        self.mem0 = (tracemalloc.get_traced_memory()[0]
+                     if self.tracer.memory else 0)
+        self.t0   = timer()
+        return self
+
+    def __exit__(self, *args):
+        t1 = timer()
+        mem1 = (tracemalloc.get_traced_memory()[0]
+                if self.tracer.memory else 0)
+        if self.node:
+            self.tracer._stack().pop()
+        self.tracer._record(self, self.t0, t1 - self.t0, mem1 - self.mem0)
+        return False
+
+
+class Tracer(object):
+    """Per-node render profiler for ehtplot Figures, Panels, and Visuals
+
+    While a Tracer is active, `Figure.__call__()`, `Figure.save()`,
+    `Panel.draw()`, `Visual.__call__()`, and the sections of the
+    bundled visuals record their wall time, call counts, and,
+    optionally, the net bytes allocated.  The records are aggregated per
+    tree node and per name (e.g., per visual type), and can be
+    exported as a Chrome trace-event JSON file (to be loaded in
+    chrome://tracing or Perfetto) or as a flat text summary.
+
+    Example:
+        with Tracer(memory=True) as t:
+            fig.save("demo.png")
+        print(t.summary())
+        t.save("demo.trace.json")
+
+    """
+    def __init__(self, memory=False):
+        """Tracer initializer
+
+        Args:
+            memory (bool): Also record the bytes allocated in each
+                span using `tracemalloc`, which slows down the traced
+                code.
+
+        """
+        self.memory = memory
+        self.events = []
+        self._local = threading.local()
+        self._lock  = threading.Lock()
+        self._t0    = timer()
+
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+
+    def _record(self, s, t0, dur, mem):
+        with self._lock:
+            self.events.append({
+                'name': s.name, 'cat': s.cat, 'node': s.node,
+                'path': '/'.join(str(i) for i in s.path),
+                'ts':   t0 - self._t0, 'dur': dur, 'bytes': mem,
+                'tid':  threading.current_thread().ident,
+            })
+
+
+    def __enter__(self):
+        global _tracer
+        if _tracer is not None:
+            raise RuntimeError("another Tracer is already active")
+        if self.memory:
+            self._started = not tracemalloc.is_tracing()
+            if self._started:
+                tracemalloc.start()
+        _tracer = self
+        return self
+
+
+    def __exit__(self, *args):
+        global _tracer
+        _tracer = None
+        if self.memory and self._started:
+            tracemalloc.stop()
+        return False
+
+
+    def stats(self, by='name'):
+        """Aggregate the recorded spans
+
+        Args:
+            by (string): "name" to aggregate by span name, e.g., per
+                visual type, or "node" to aggregate node spans by
+                their tree path.
+
+        Returns:
+            dict: Map from key to a dictionary with "calls", "time",
+                and "bytes".
+
+        """
+        out = {}
+        for e in self.events:
+            if by == 'node':
+                if not e['node']:
+                    continue
+                key = "{} [{}]".format(e['name'], e['path'])
+            else:
+                key = e['name']
+            s = out.setdefault(key, {'calls': 0, 'time': 0.0, 'bytes': 0})
+            s['calls'] += 1
+            s['time']  += e['dur']
+            s['bytes'] += e['bytes']
+        return out
+
+
+    def summary(self):
+        """Return a flat text summary of the recorded spans"""
+        lines = []
+        for by in ['name', 'node']:
+            stats = self.stats(by=by)
+            lines.append("{:>8} {:>12} {:>12} {:>14}  {}".format(
+                "calls", "total (s)", "mean (ms)", "bytes", "per " + by))
+            for key, s in sorted(stats.items(), key=lambda kv: -kv[1]['time']):
+                lines.append("{:8d} {:12.6f} {:12.3f} {:14d}  {}".format(
+                    s['calls'], s['time'], 1e3 * s['time'] / s['calls'],
+                    s['bytes'], key))
+            lines.append("")
+        return "\n".join(lines)
+
+
+    def chrome(self):
+        """Return the spans in the Chrome trace-event format"""
+        pid = os.getpid()
+        return {'traceEvents': [{
+            'name': e['name'], 'cat': e['cat'], 'ph': 'X',
+            'ts':   1e6 * e['ts'], 'dur': 1e6 * e['dur'],
+            'pid':  pid, 'tid': e['tid'],
+            'args': {'path': e['path'], 'bytes': e['bytes']},
+        } for e in self.events], 'displayTimeUnit': 'ms'}
+
+
+    def save(self, file):
+        """Save the spans as a Chrome trace-event JSON file"""
+        with open(file, 'w') as f:
+            json.dump(self.chrome(), f)
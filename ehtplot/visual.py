@@ -20,6 +20,8 @@ from __future__ import absolute_import
 
 from os.path import basename, dirname, join, splitext
 from glob import glob
+from inspect import signature
+from functools import lru_cache
 
 try:
     import importlib.util as iu
@@ -29,6 +31,19 @@ except ImportError:
 import numpy as np
 
 from ehtplot.helpers import merge_dict
+from ehtplot.trace   import traced
+
+
+@lru_cache(maxsize=256)
+def _keywords(func):
+    """Keywords taken by the callable `func`; None if it takes any"""
+    try:
+        params = signature(func).parameters
+    except (TypeError, ValueError):
+        return None # cannot tell; pass all keywords through
+    if any(p.kind == p.VAR_KEYWORD for p in params.values()):
+        return None
+    return frozenset(params)
 
 
 class Visual(object):
@@ -40,16 +55,26 @@ class Visual(object):
     difference is that the arguments and keyworded arguments can be
     overridden/modified at "draw time".
 
+    Visuals can be pickled.  A visualizing function loaded from
+    `Visual.paths` is pickled by its name and loaded again when the
+    Visual is unpickled, so a tree of Visuals can be sent to other
+    processes.  Other visualizing functions are pickled as usual.
+
     Attributes:
         paths (list of strings): A list of paths used by Visual to
             look up visualizing
         visuals (list of strings): A list of valid names that can be
             loaded into visualizing functions.
+        optional (tuple of strings): Keywords that Panels pass down
+            at draw time, e.g., `colorbar=False` under a shared
+            colorbar, and that are dropped for visualizing functions
+            not taking them.
 
     """
     paths   = [join(dirname(__file__), "visuals")]
     visuals = [splitext(basename(f))[0]
                for p in paths for f in glob(join(p, "*.py"))]
+    optional = ('colorbar',)
 
     @classmethod
     def _load_from_file(cls, visual, prefix="visualize_", ext=".py"):
@@ -87,6 +112,27 @@ class Visual(object):
             return cls._load_from_file(visual) # python3
 
 
+    @classmethod
+    def _name(cls, func, prefix="visualize_"):
+        """The visual key of a function loaded by _load_from_file(), or None"""
+        name = getattr(func, '__name__', '')
+        if (name.startswith(prefix) and
+            getattr(func, '__module__', None) == name and
+            name[len(prefix):] in cls.visuals):
+            return name[len(prefix):]
+        return None
+
+
+    @staticmethod
+    def _accepts(func, key):
+        """Check if the callable `func` takes the keyword `key`"""
+        try:
+            keys = _keywords(func)
+        except TypeError: # unhashable callable
+            keys = _keywords.__wrapped__(func)
+        return keys is None or key in keys
+
+
     @classmethod
     def _prepare(cls, p):
         """Convert a generic visualable to a callable."""
@@ -133,20 +179,40 @@ class Visual(object):
                 instance of Visual.
             kwprops (dict): The default keywords when realizing an
                 instance of Visual.
+            dirty (bool): True if the Visual has been updated since
+                it was last realized in retained mode.
 
         """
         self.visual  = self._prepare(visualable)
         self.props   = args
         self.kwprops = kwargs
+        self.dirty   = True
 
 
     def update(self, *args, **kwargs):
         """Update internal properties"""
         self.props   = args if args else self.props
         self.kwprops.update(kwargs)
+        self.dirty   = True
         return self
 
 
+    def __getstate__(self):
+        """Replace a loaded visualizing function by its visual key"""
+        state = self.__dict__.copy()
+        name  = self._name(self.visual)
+        if name is not None:
+            state['visual'] = name
+        return state
+
+
+    def __setstate__(self, state):
+        """Load the visualizing function back from its visual key"""
+        self.__dict__.update(state)
+        self.visual = self._prepare(self.visual)
+
+
+    @traced(lambda self: getattr(self.visual, '__name__', 'Visual'), 'visual')
     def __call__(self, ax, *args, **kwargs):
         """Visual realizer
 
@@ -168,6 +234,9 @@ class Visual(object):
         """
         props   = args if args else self.props
         kwprops = merge_dict(self.kwprops, kwargs)
+        for k in self.optional:
+            if k in kwargs and not self._accepts(self.visual, k):
+                del kwprops[k]
         return self.visual(ax, *props, **kwprops)
 
 
@@ -20,9 +20,13 @@ from __future__ import absolute_import
 from __future__ import division
 
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib as mpl
 from mpl_toolkits.axes_grid1 import make_axes_locatable
-from matplotlib.colors import LogNorm
+from matplotlib.colors import Normalize, LogNorm
+from matplotlib.cm import ScalarMappable
+
+from ehtplot.trace   import span
+from ehtplot.helpers import crop_to_view, rebin
 
 
 def add_scale(ax, label='$50 \mu $arcsec', length=10, color='gold', padding=0.15, end_factor=0.015,font=10.56, lw=1):
@@ -36,9 +40,18 @@ def add_scale(ax, label='$50 \mu $arcsec', length=10, color='gold', padding=0.15
         ax.text((lims[0]+factor)+1.5,(lims[0]+factor)*.95, label, fontsize=font, color=color)
 
 
+def device_size(ax):
+    """Largest side of `ax` in pixels of the saved or shown figure"""
+    fig = ax.figure
+    dpi = mpl.rcParams['savefig.dpi']
+    if dpi == 'figure':
+        dpi = fig.dpi
+    return max(ax.get_position().size * fig.get_size_inches()) * max(dpi, fig.dpi)
+
+
 def visualize_image(ax, img, name=None,
                imgsz=None, pxsz=None, zoom=True, unit='$GMc^{-2}$', length_scale=None,
-               norm=1, scale='lin', vlim=None, colorbar=True):
+               norm=1, scale='lin', vlim=None, colorbar=True, oversample=2):
     """!@brief Makes a plot of an image.
 
     This can be used for a single image or for multiple subplots,
@@ -96,6 +109,16 @@ def visualize_image(ax, img, name=None,
 
     @param colorbar optional keyword, default set to True.
 
+    @param oversample optional keyword, default set to 2.  Images
+    with more than `oversample` pixels per output pixel in the visible
+    field are area-averaged down to about `oversample` pixels per
+    output pixel before drawing.  Set to None to draw the full image.
+
+    @return A matplotlib ScalarMappable that maps the normalized values
+    to colors, as shown by the colorbar.  The normalization is applied
+    through the color limits, so `img` is never modified or copied;
+    read-only, memory-mapped, and float32 arrays are drawn as is.
+
     """
     if imgsz is not None and pxsz is not None:
         raise ValueError("imgsz and pxsz cannot be set simultaneously")
@@ -105,22 +128,47 @@ def visualize_image(ax, img, name=None,
         imgsz = 64
     bb = [-0.5*imgsz, 0.5*imgsz, -0.5*imgsz, 0.5*imgsz]
 
-    if norm is not False:
-        img *= norm / np.max(img)
-
-    if scale == 'lin':
-        if vlim is None:
-            vlim = [0, 1]
-        scale_kwargs = {'vmin': vlim[0], 'vmax': vlim[1]}
-    elif scale == 'log':
-        scale_kwargs = {'norm': (LogNorm() if vlim is None else
-                                 LogNorm(vmin=vlim[0], vmax=vlim[1]))}
-
-    im = ax.imshow(img, extent=bb, **scale_kwargs)
+    with span('prep', 'image'):
+        # Fold the normalization into the color limits so that the
+        # pixel data is never modified or copied
+        s = norm / np.max(img) if norm is not False else 1
+        if scale == 'lin':
+            if vlim is None:
+                vlim = [0, 1]
+            Norm = Normalize
+        elif scale == 'log':
+            if vlim is None: # autoscale on the full image, not the drawn part
+                vlim = [s * np.min(img, where=img > 0, initial=np.inf),
+                        s * np.max(img)]
+            Norm = LogNorm
+        else:
+            raise ValueError("unknown scale \"{}\"".format(scale))
+        sm = ScalarMappable(Norm(vmin=vlim[0], vmax=vlim[1])) # normalized units
+
+    r0 = np.sqrt(27) # BH shadow in units of GM/c**2
+    if zoom is True: # only draw the visible part and a margin
+        with span('crop', 'image'):
+            lim     = [-2 * r0, 2 * r0]
+            img, bb = crop_to_view(img, bb, lim, lim,
+                                   mpl.rcParams['image.origin'])
+
+    if oversample is not None:
+        with span('downsample', 'image'):
+            width  = bb[1] - bb[0]
+            fov    = min(4 * r0, width) if zoom is True else width
+            factor = int(img.shape[1] * fov / width /
+                         (oversample * device_size(ax)))
+            if factor >= 2: # area-average; the extent is unchanged
+                img = rebin(img, (img.shape[0] // factor,
+                                  img.shape[1] // factor))
+
+    with span('imshow', 'image'):
+        im = ax.imshow(img, extent=bb, norm=Norm(vmin=vlim[0] / s,
+                                                 vmax=vlim[1] / s))
+        sm.set_cmap(im.get_cmap())
     ax.tick_params(axis='both', which='major', width=1.5)
 
     if zoom is True: # flip_x = False, zoom=True
-        r0 = np.sqrt(27) # BH shadow in units of GM/c**2
         ax.set_xlim([-2 * r0, 2 * r0])
         ax.set_xticks([-10, -5, 0, 5, 10])
 
@@ -148,7 +196,10 @@ def visualize_image(ax, img, name=None,
         else:
             orientation = 'vertical'
 
-        divider = make_axes_locatable(ax)
-        cax     = divider.append_axes(colorbar, size='7%', pad=0.05)
-        cbar    = plt.colorbar(im, cax=cax, orientation=orientation)
-        cbar.ax.xaxis.set_ticks_position(colorbar)
+        with span('colorbar', 'image'):
+            divider = make_axes_locatable(ax)
+            cax     = divider.append_axes(colorbar, size='7%', pad=0.05)
+            cbar    = ax.figure.colorbar(sm, cax=cax, orientation=orientation)
+            cbar.ax.xaxis.set_ticks_position(colorbar)
+
+    return sm
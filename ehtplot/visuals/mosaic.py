@@ -0,0 +1,191 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+from __future__ import division
+
+import numpy as np
+import matplotlib as mpl
+from matplotlib.ticker import FixedLocator, FixedFormatter, MaxNLocator
+from mpl_toolkits.axes_grid1 import make_axes_locatable
+from matplotlib.colors import Normalize, LogNorm
+from matplotlib.cm import ScalarMappable
+
+
+def crop(img, imgsz, zoom):
+    """Crop `img` to the field of view shown by visualize_image()"""
+    if zoom is not True:
+        return img
+    r0 = np.sqrt(27) # BH shadow in units of GM/c**2
+    n  = img.shape[0]
+    i0 = max(int(np.floor((0.5 - 2 * r0 / imgsz) * n)), 0)
+    return img[i0:n-i0, i0:n-i0]
+
+
+def normalizer(img, norm=1, scale='lin', vlim=None):
+    """Normalization of a single image as done by visualize_image()
+
+    Instead of rescaling `img`, the rescaling is folded into the
+    limits of the returned matplotlib Normalize instance so the pixel
+    data is never touched.
+
+    """
+    s = norm / np.max(img) if norm is not False else 1
+    if scale == 'lin':
+        if vlim is None:
+            vlim = [0, 1]
+        return Normalize(vmin=vlim[0] / s, vmax=vlim[1] / s)
+    elif scale == 'log':
+        if vlim is None:
+            return LogNorm(vmin=np.min(img[img > 0]), vmax=np.max(img))
+        return LogNorm(vmin=vlim[0] / s, vmax=vlim[1] / s)
+    else:
+        raise ValueError("unknown scale \"{}\"".format(scale))
+
+
+def visualize_mosaic(ax, imgs, names=None, gutter=2,
+                     imgsz=None, pxsz=None, zoom=True,
+                     norm=1, scale='lin', vlim=None, colorbar=True,
+                     cmap=None, interpolation=None, labelcolor='w',
+                     ticks=False, unit='GM/c^2'):
+    """Composite a grid of images into a single image and show it
+
+    All images are colormapped directly into one RGBA canvas, with
+    transparent gutters between the cells, which is then drawn with
+    a single imshow().  The rendering cost therefore scales with the
+    total number of pixels instead of the number of cells.
+
+    Args:
+        ax (matplotlib.axes.Axes): The matplotlib Axes to be plot on.
+        imgs (list of lists of 2D arrays): The images; `imgs[0]` is
+            the bottom row of the mosaic.  All images must have the
+            same shape.
+        names (list of lists of strings): Optional per-cell labels.
+        gutter (int): Width of the gutters in canvas pixels.
+        imgsz, pxsz, zoom, norm, scale, vlim: Same as in
+            visualize_image(), applied to every cell.
+        colorbar (bool or string): Draw a single colorbar for the
+            whole mosaic; same as in visualize_image().
+        cmap (string or matplotlib.colors.Colormap): Colormap; use
+            "image.cmap" if None.
+        interpolation (string): Interpolation of the canvas; use
+            "image.interpolation" if None.
+        labelcolor (string): Color of the per-cell labels.
+        ticks (bool): If True, place the cells in the coordinates of
+            visualize_image() and label the outer edges of the
+            mosaic with the same ticks as every cell, so the grid
+            reads like `layout='grid'` with `ticklabels='outer'`.
+            The ticks are still drawn by the single Axes.
+        unit (string): Unit of the axis labels if `ticks` is True.
+
+    Returns:
+        matplotlib.cm.ScalarMappable: The mappable of the colorbar.
+
+    """
+    if cmap is None:
+        cmap = mpl.rcParams['image.cmap']
+    if not isinstance(cmap, mpl.colors.Colormap):
+        cmap = mpl.cm.get_cmap(cmap)
+    flip = mpl.rcParams['image.origin'] == 'upper'
+
+    nrows = len(imgs)
+    ncols = len(imgs[0])
+    shape = np.shape(imgs[0][0])
+    if any(np.shape(img) != shape for row in imgs for img in row):
+        raise ValueError("all images in a mosaic must have the same shape")
+
+    if imgsz is not None and pxsz is not None:
+        raise ValueError("imgsz and pxsz cannot be set simultaneously")
+    elif pxsz is not None:
+        imgsz = shape[0] * pxsz
+    elif imgsz is None:
+        imgsz = 64
+
+    h, w   = crop(np.empty(shape), imgsz, zoom).shape
+    canvas = np.zeros((nrows * (h + gutter) - gutter,
+                       ncols * (w + gutter) - gutter, 4), dtype=np.uint8)
+
+    for i, row in enumerate(imgs):
+        for j, img in enumerate(row):
+            y, x = i * (h + gutter), j * (w + gutter)
+            n    = normalizer(img, norm=norm, scale=scale, vlim=vlim)
+            img  = crop(img, imgsz, zoom)
+            if flip: # canvas is always in the "lower" origin
+                img = img[::-1]
+            canvas[y:y+h, x:x+w] = cmap(n(img), bytes=True)
+
+    # Cell (i, j) has its lower left corner at (x0 + j dx, y0 + i dy)
+    # in data coordinates; without ticks, data coordinates are pixels
+    if ticks:
+        p      = imgsz / shape[0]
+        x0, y0 = -0.5 * w * p, -0.5 * h * p
+        dx, dy = (w + gutter) * p, (h + gutter) * p
+    else:
+        p      = 1
+        x0, y0 = -0.5, -0.5
+        dx, dy = w + gutter, h + gutter
+    extent = [x0, x0 + canvas.shape[1] * p, y0, y0 + canvas.shape[0] * p]
+    ax.imshow(canvas, origin='lower', interpolation=interpolation,
+              extent=extent)
+
+    if ticks:
+        if zoom is True:
+            local = np.array([-10, -5, 0, 5, 10])
+        else:
+            local = MaxNLocator(5).tick_values(x0, -x0)
+            local = local[np.abs(local) <= -x0]
+        for axis, n, d in ((ax.xaxis, ncols, dx), (ax.yaxis, nrows, dy)):
+            axis.set_major_locator(FixedLocator(
+                (np.arange(n)[:,None] * d + local).ravel()))
+            axis.set_major_formatter(FixedFormatter(
+                ['{:g}'.format(t) for t in local] * n))
+        ax.tick_params(axis='both', which='major', width=1.5)
+        ax.set_xlabel('X ({})'.format(unit))
+        ax.set_ylabel('Y ({})'.format(unit))
+    else:
+        ax.set_axis_off()
+
+    if names is not None:
+        for i, row in enumerate(names):
+            for j, name in enumerate(row):
+                if name is not None:
+                    ax.text(x0 + j * dx + 0.26 * w * p,
+                            y0 + i * dy + 0.26 * h * p,
+                            name, color=labelcolor)
+
+    # The colorbar is labeled in normalized units as in visualize_image()
+    img = imgs[0][0]
+    n   = normalizer(img, norm=norm, scale=scale, vlim=vlim)
+    s   = norm / np.max(img) if norm is not False else 1
+    sm  = ScalarMappable(type(n)(vmin=n.vmin * s, vmax=n.vmax * s), cmap)
+
+    if colorbar is True:
+        colorbar = 'top'
+
+    if colorbar is not False:
+        if colorbar == 'top' or colorbar == 'bottom':
+            orientation = 'horizontal'
+        else:
+            orientation = 'vertical'
+
+        divider = make_axes_locatable(ax)
+        cax     = divider.append_axes(colorbar, size='7%', pad=0.05)
+        cbar    = ax.figure.colorbar(sm, cax=cax, orientation=orientation)
+        cbar.ax.xaxis.set_ticks_position(colorbar)
+
+    return sm
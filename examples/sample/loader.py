@@ -1,7 +1,7 @@
-import numpy as np
+from ehtplot.extra.io import loadtxt
 
 def load(name, component=None):
     if component is None:
-        return np.loadtxt(name+"/model_B.tsv.gz")
+        return loadtxt(name+"/model_B.tsv.gz")
     else:
-        return np.loadtxt(name+"/model_B."+component+".tsv.gz")
+        return loadtxt(name+"/model_B."+component+".tsv.gz")
@@ -55,7 +55,8 @@ setup(
 
     packages=find_packages(exclude=["doc*", "test*"]),
     package_data={'ehtplot.theme': ['*.mplstyle'],
-                  'ehtplot.color': ['ctabs/*.ctab']},
+                  'ehtplot.color': ['ctabs/*.ctab'],
+                  'ehtplot.extra': ['data/*.npy']},
 
     install_requires=[
       # "colorspacious",
@@ -0,0 +1,110 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+import importlib.metadata
+
+import ehtplot as eht
+
+from ehtplot       import cache
+from ehtplot.cache import RenderCache
+
+
+def figure():
+    return eht.plot('image', np.arange(64.0).reshape(8, 8))
+
+
+def test_key_changes_with_version(tmp_path, monkeypatch):
+    rc  = RenderCache(str(tmp_path))
+    fig = figure()
+
+    monkeypatch.setattr(importlib.metadata, 'version',
+                        lambda name: {'pyehtplot': '0.9.0'}[name])
+    k0 = rc.key(fig)
+    assert rc.key(fig) == k0
+    monkeypatch.setattr(importlib.metadata, 'version',
+                        lambda name: {'pyehtplot': '0.9.1'}[name])
+    assert rc.key(fig) != k0
+
+
+def test_key_changes_with_source(tmp_path, monkeypatch):
+    rc  = RenderCache(str(tmp_path))
+    fig = figure()
+
+    k0 = rc.key(fig)
+    monkeypatch.setattr(cache, '_digest', lambda: 'edited')
+    assert rc.key(fig) != k0
+
+
+def test_digest_is_stable():
+    cache._digest.cache_clear()
+    d = cache._digest()
+    cache._digest.cache_clear()
+    assert cache._digest() == d
+
+
+def closure(color):
+    def visualize(ax, img, **kwargs):
+        ax.imshow(img)
+        ax.set_facecolor(color)
+    return visualize
+
+
+def test_closures_hit_and_miss(tmp_path):
+    rc  = RenderCache(str(tmp_path / "cache"))
+    img = np.arange(64.0).reshape(8, 8)
+    red, blue, red2 = (str(tmp_path / n) for n in ("r.png", "b.png",
+                                                     "r2.png"))
+
+    assert eht.plot(closure('r'), img).save(red,  cache=rc) == 1
+    assert eht.plot(closure('b'), img).save(blue, cache=rc) == 1
+    assert eht.plot(closure('r'), img).save(red2, cache=rc) == 0
+    assert (rc.hits, rc.misses) == (1, 2)
+    with open(red, 'rb') as a, open(red2, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_lambdas_and_defaults(tmp_path):
+    rc  = RenderCache(str(tmp_path))
+    img = np.arange(64.0).reshape(8, 8)
+    f   = lambda ax, img, **kwargs: ax.imshow(img)
+    g   = lambda ax, img, **kwargs: ax.imshow(img.T)
+    h   = lambda ax, img, c='r', **kwargs: ax.imshow(img)
+    k   = lambda ax, img, c='b', **kwargs: ax.imshow(img)
+    keys = [rc.key(eht.plot(v, img)) for v in (f, g, h, k)]
+    assert len(set(keys)) == 4
+    assert rc.key(eht.plot(f, img)) == keys[0]
+
+
+class Opaque(object):
+    def __call__(self, ax, img, **kwargs):
+        ax.imshow(img)
+
+    def __reduce__(self):
+        raise TypeError("not picklable")
+
+
+def test_uncacheable_always_renders(tmp_path):
+    rc   = RenderCache(str(tmp_path / "cache"))
+    img  = np.arange(64.0).reshape(8, 8)
+    fig  = eht.plot(Opaque(), img)
+    file = str(tmp_path / "o.png")
+    assert rc.key(fig) is None
+    assert fig.save(file, cache=rc) == 1
+    assert fig.save(file, cache=rc) == 1
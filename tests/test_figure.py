@@ -0,0 +1,72 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import warnings
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import ehtplot as eht
+
+
+def test_show_without_pyplot():
+    fig = eht.plot('image', np.random.default_rng(0).random((8, 8)),
+                   pyplot=False, reuse=True)
+    before = set(plt.get_fignums())
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore') # Agg is non-interactive
+        fig.show()
+    new = set(plt.get_fignums()) - before
+    assert len(new) == 1
+    assert fig.kwprops['pyplot'] is False
+    plt.close(new.pop())
+
+
+def test_concurrent_saves_overlap(tmp_path, monkeypatch):
+    from ehtplot import figure
+
+    img  = np.random.default_rng(0).random((32, 32))
+    figs = [eht.plot('image', img, pyplot=False),
+            eht.plot('image', img, pyplot=False, style='dark_background')]
+    serial = [str(tmp_path / "s{}.png".format(i)) for i in range(2)]
+    for f, file in zip(figs, serial):
+        f.save(file)
+
+    # Both threads must be rendering at the same time to pass the
+    # barrier; a lock held across rendering would break it
+    barrier = threading.Barrier(2, timeout=10)
+    rasterize = figure._rasterize
+    def rendezvous(fig, dpi):
+        barrier.wait()
+        return rasterize(fig, dpi)
+    monkeypatch.setattr(figure, '_rasterize', rendezvous)
+
+    files = [str(tmp_path / "c{}.png".format(i)) for i in range(2)]
+    with ThreadPoolExecutor(2) as ex:
+        list(ex.map(lambda i: figs[i].save(files[i]), range(2)))
+
+    for s, c in zip(serial, files):
+        with open(s, 'rb') as a, open(c, 'rb') as b:
+            assert a.read() == b.read()
+    assert matplotlib.rcParams['savefig.facecolor'] == \
+        matplotlib.rcParamsDefault['savefig.facecolor']
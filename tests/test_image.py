@@ -0,0 +1,46 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from ehtplot.extra.image import plot_image
+
+
+@pytest.mark.parametrize('array', [np.zeros((32, 32)),
+                                   -np.ones((32, 32)),
+                                   np.eye(32) - 1])
+def test_log_without_positive_values(array):
+    fig, ax = plt.subplots()
+    im = plot_image(ax, array, norm=False, scale='log')
+    fig.canvas.draw()
+    assert im.norm.vmin > 0 and im.norm.vmax > 0
+    plt.close(fig)
+
+
+def test_log_limits():
+    array = np.outer(np.arange(32), np.arange(32)) - 4.0
+    fig, ax = plt.subplots()
+    im = plot_image(ax, array, norm=False, scale='log', zoom=False)
+    fig.canvas.draw()
+    assert im.norm.vmin == np.min(array[array > 0])
+    assert im.norm.vmax == np.max(array)
+    plt.close(fig)
@@ -0,0 +1,233 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import gc
+import os
+import sys
+import stat
+import time
+import threading
+import subprocess
+
+import numpy as np
+import pytest
+
+from ehtplot.extra    import io
+from ehtplot.extra.io import loadtxt
+
+
+def sidecars(d, name):
+    """Sidecars ".<name>.<kwargs tag>.<source stamp>.npy" of `name`"""
+    p = "." + name + "."
+    return sorted(f for f in os.listdir(str(d))
+                  if f.startswith(p) and f.endswith(".npy")
+                  and f[len(p):].count(".") == 2)
+
+
+def write(path, arr, mtime):
+    np.savetxt(str(path), arr)
+    os.utime(str(path), ns=(mtime, mtime))
+
+
+def test_sidecar_mode(tmp_path):
+    src = tmp_path / "data.txt"
+    write(src, np.eye(3), 10**18)
+    mask = os.umask(0o027)
+    try:
+        loadtxt(str(src))
+    finally:
+        os.umask(mask)
+    (f,) = sidecars(tmp_path, "data.txt")
+    assert stat.S_IMODE(os.stat(str(tmp_path / f)).st_mode) == 0o640
+
+
+def test_sidecar_reuse(tmp_path):
+    src = tmp_path / "data.txt"
+    write(src, np.eye(3), 10**18)
+    a = loadtxt(str(src))
+    assert isinstance(a, np.memmap)
+    assert np.array_equal(a, np.eye(3))
+    assert np.array_equal(loadtxt(str(src)), np.eye(3))
+    assert len(sidecars(tmp_path, "data.txt")) == 1
+
+
+def test_stale_sidecars_removed(tmp_path):
+    src   = tmp_path / "data.txt"
+    other = tmp_path / "data.txt.gz.txt" # its sidecars share the prefix
+    write(src,   np.eye(3), 10**18)
+    write(other, np.eye(2), 10**18)
+    loadtxt(str(other))
+    loadtxt(str(src))
+    loadtxt(str(src), usecols=(0, 1))
+    assert len(sidecars(tmp_path, "data.txt")) == 2
+
+    write(src, 2 * np.eye(3), 2 * 10**18) # the source changes
+    assert np.array_equal(loadtxt(str(src)), 2 * np.eye(3))
+    assert len(sidecars(tmp_path, "data.txt")) == 1
+    assert len(sidecars(tmp_path, "data.txt.gz.txt")) == 1
+
+
+_loader_src = '''
+from ehtplot.extra.io import Bundle
+
+class Handle(Bundle):
+    version = {version}
+    def __init__(self, name, *args, **kwargs):
+        self.args   = args
+        self.closed = False
+    def close(self):
+        self.closed = True
+'''
+
+
+def bundle(tmp_path, version=0, mtime=10**18):
+    d = tmp_path / "bundle"
+    d.mkdir(exist_ok=True)
+    loader = d / "loader.py"
+    loader.write_text(_loader_src.format(version=version))
+    os.utime(str(loader), ns=(mtime, mtime))
+    return str(d)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(io, 'pool_size', 2)
+    io.clear_pool()
+    yield
+    io.clear_pool()
+
+
+def test_loader_cached(tmp_path):
+    d = bundle(tmp_path)
+    full = os.path.realpath(os.path.join(d, "loader.py"))
+    s0, e0 = io._loader(full)
+    s1, e1 = io._loader(full)
+    assert s0 == s1 and e0 is e1
+    bundle(tmp_path, version=1, mtime=2 * 10**18)
+    s2, e2 = io._loader(full)
+    assert s2 != s0 and e2 is not e0 and e2.version == 1
+
+
+def test_pool_reuse_and_lru(tmp_path, pool):
+    d = bundle(tmp_path)
+    a = io.open_bundle(d, 1, reuse=True)
+    assert io.open_bundle(d, 1, reuse=True) is a
+    assert io.open_bundle(d, 1) is not a # reuse=False bypasses the pool
+    with io.open_bundle(d, 1, reuse=True) as h:
+        assert h is a
+    assert not a.closed
+
+    b = io.open_bundle(d, 2, reuse=True)
+    io.open_bundle(d, 1, reuse=True)     # a is now the most recent
+    c = io.open_bundle(d, 3, reuse=True) # evicts b
+    assert b.closed and not a.closed and not c.closed
+    assert io.open_bundle(d, 2, reuse=True) is not b
+
+
+def test_pool_close_evicts(tmp_path, pool):
+    d = bundle(tmp_path)
+    a = io.open_bundle(d, reuse=True)
+    a.close()
+    assert a.closed
+    b = io.open_bundle(d, reuse=True)
+    assert b is not a and not b.closed
+
+
+def test_pool_new_loader(tmp_path, pool):
+    d = bundle(tmp_path)
+    a = io.open_bundle(d, reuse=True)
+    bundle(tmp_path, version=1, mtime=2 * 10**18)
+    b = io.open_bundle(d, reuse=True)
+    assert b is not a and b.version == 1
+    assert a.closed
+
+
+def test_sidecar_tag_stable_across_processes(tmp_path):
+    src = tmp_path / "data.txt"
+    write(src, np.eye(3), 10**18)
+    code = ("import sys; from ehtplot.extra.io import loadtxt; "
+            "loadtxt(sys.argv[1], converters={0: lambda s: float(s) + 1})")
+    for _ in range(2):
+        subprocess.check_call([sys.executable, "-c", code, str(src)])
+    assert len(sidecars(tmp_path, "data.txt")) == 1
+
+
+def test_sidecars_per_source_bounded(tmp_path):
+    src = tmp_path / "data.txt"
+    write(src, np.arange(12.0).reshape(2, 6), 10**18)
+    for i in range(6):
+        assert loadtxt(str(src), usecols=(i,)).shape == (2,)
+    assert len(sidecars(tmp_path, "data.txt")) == io.sidecars
+
+
+class Slow(io.StreamBundle):
+    """Frames of 1000 float64 that take `delay` seconds each to read"""
+    def __init__(self, n=24, delay=0.01, **kwargs):
+        super().__init__(**kwargs)
+        self.n       = n
+        self.delay   = delay
+        self.started = 0
+        self.lock    = threading.Lock()
+
+    def __len__(self):
+        return self.n
+
+    def read(self, i):
+        with self.lock:
+            self.started += 1
+        time.sleep(self.delay * (1 + i % 3)) # out of order completion
+        return np.full(1000, i, dtype=float)
+
+
+def test_stream_order_and_budget():
+    size = 8000
+    with Slow(depth=8, workers=4, budget=3 * size) as s:
+        held = 0
+        for i, frame in enumerate(s):
+            assert frame[0] == i
+            held = max(held, s.started - i - 1) # read ahead of frame i
+        assert i == s.n - 1
+        stats = s.stats()
+    assert stats['frames'] == stats['reads'] == s.n
+    assert stats['bytes'] == s.n * size
+    assert 0 < stats['peak'] <= 3 * size
+    assert held <= 3
+
+
+def test_stream_stalls():
+    with Slow(delay=0.01, depth=1, workers=1) as s: # slow reads
+        assert len(list(s)) == s.n
+        assert s.stats()['stalls'] >= s.n // 2
+        assert s.stats()['stall'] > 0
+
+    with Slow(delay=0.001, depth=4, workers=2) as s: # slow consumer
+        for _ in s:
+            time.sleep(0.02)
+        assert s.stats()['stalls'] <= 1
+
+
+def test_stream_finalized():
+    s = Slow(depth=2, workers=2)
+    next(iter(s))
+    threads = list(s._pool._threads)
+    assert threads
+    del s
+    gc.collect()
+    for t in threads:
+        t.join(timeout=5)
+        assert not t.is_alive()
@@ -0,0 +1,81 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from matplotlib.ticker import NullLocator
+
+import ehtplot as eht
+
+
+def cells(fig):
+    """Image cells of a 3x3 grid, bottom-left first"""
+    axes = [a for a in fig.axes if a.images]
+    return sorted(axes, key=lambda a: (a.get_position().y0,
+                                       a.get_position().x0))
+
+
+def check(fig):
+    axes = cells(fig)
+    assert len(axes) == 9
+    for i, a in enumerate(axes):
+        inner = (i // 3 > 0, i % 3 > 0) # not bottom row, not left column
+        for axis, hidden in zip((a.xaxis, a.yaxis), inner):
+            null = isinstance(axis.get_major_locator(), NullLocator)
+            assert null == hidden
+            assert (len(axis.get_ticklocs()) == 0) == hidden
+
+
+def test_grid_outer_ticks():
+    img = np.random.default_rng(0).random((16, 16))
+    fig = eht.plot('image', [[img] * 3] * 3, colorbar=False,
+                   layout='grid', ticklabels='outer').draw()
+    fig.canvas.draw()
+    check(fig)
+    plt.close(fig)
+
+
+def test_grid_outer_ticks_redraw():
+    img = np.random.default_rng(0).random((16, 16))
+    f   = eht.plot('image', [[img] * 3] * 3, colorbar=False,
+                   layout='grid', ticklabels='outer')
+    r   = f.realize()
+    f.panel.panels[1].panels[1].panels[0].update(img.T)
+    assert f.redraw() == 1
+    check(r.fig)
+    plt.close(r.fig)
+
+
+def test_mosaic_outer_ticks():
+    img = np.random.default_rng(0).random((64, 64))
+    fig = eht.plot('image', [[img] * 3] * 3, colorbar=False, imgsz=64,
+                   layout='grid', mosaic={'ticks': True}).draw()
+    fig.canvas.draw()
+    assert len(fig.axes) == 1
+    ax = fig.axes[0]
+    assert len(ax.images) == 1
+    for axis in (ax.xaxis, ax.yaxis):
+        labels = [t.get_text() for t in axis.get_ticklabels()]
+        assert labels == ['-10', '-5', '0', '5', '10'] * 3
+        locs = axis.get_ticklocs()
+        assert np.allclose(locs[:5], [-10, -5, 0, 5, 10])
+        assert np.all(np.diff(locs) > 0)
+    plt.close(fig)
@@ -0,0 +1,78 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import gc
+import os
+
+import numpy as np
+import pytest
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import ehtplot as eht
+
+from ehtplot.figure import live_figures, clear_pool
+
+from benchmarks.common import rss
+
+
+_modes = {'pyplot':      {},
+          'pyplot-free': {'pyplot': False},
+          'reuse':       {'pyplot': False, 'reuse': True}}
+
+
+def fds():
+    """Number of open file descriptors, or None if unknown"""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except (IOError, OSError):
+        return None
+
+
+def state():
+    gc.collect()
+    figs = sum(isinstance(o, matplotlib.figure.Figure)
+               for o in gc.get_objects())
+    return {'live': live_figures(), 'pyplot': len(plt.get_fignums()),
+            'figures': figs, 'fds': fds(), 'rss': rss() / 2**20}
+
+
+@pytest.mark.parametrize('mode', sorted(_modes))
+def test_save_loop_is_bounded(mode, tmp_path):
+    img  = np.random.default_rng(0).random((64, 64))
+    fig  = eht.plot('image', img, figsize=(2, 2), dpi=50, **_modes[mode])
+    file = str(tmp_path / "soak.png")
+    try:
+        for _ in range(10): # warm up caches and the figure pool
+            fig.save(file)
+        s0 = state()
+        for _ in range(60):
+            fig.save(file)
+        s1 = state()
+    finally:
+        clear_pool()
+
+    assert s1['live'] == s0['live'] == 0
+    assert s1['pyplot'] == s0['pyplot']
+    assert s1['figures'] == s0['figures']
+    assert s1['fds'] == s0['fds']
+    # 60 leaked figures would be ~60 MiB.  Without `reuse`, matplotlib's
+    # native per-renderer allocations grow by a few KiB per save, so
+    # this bound only holds for short loops; long soaks need `reuse`.
+    assert s1['rss'] - s0['rss'] < 16
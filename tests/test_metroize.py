@@ -0,0 +1,49 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+
+from ehtplot.extra.metroize import translate_threshold
+
+
+def reference(img, threshold=0.5):
+    """The original sort-based translate_threshold()"""
+    threshold *= np.sum(img)
+    s = np.sort(img.flatten())
+    i = np.searchsorted(np.cumsum(s), threshold, side="left")
+    return s[i]
+
+
+def images():
+    rng = np.random.default_rng(0)
+    y, x = np.indices((128, 128)) - 64
+    yield 'random',   rng.random((64, 64))
+    yield 'ring',     np.exp(-(np.hypot(x, y) - 30)**2 / 20)
+    yield 'sparse',   rng.random((64, 64)) * (rng.random((64, 64)) > 0.9)
+    yield 'lognorm',  rng.lognormal(0, 3, (200, 100))
+    yield 'constant', np.ones((64, 64))
+    yield 'flat',     np.ones((64, 64)) + 1e-15 * rng.random((64, 64))
+    yield 'tiny',     1e-300 * (1 + rng.random((64, 64)))
+    yield 'steps',    np.repeat(np.arange(4.0), 4096).reshape(128, 128)
+
+
+@pytest.mark.parametrize('name, img', list(images()))
+@pytest.mark.parametrize('threshold', [0.1, 0.5, 0.9])
+def test_translate_threshold(name, img, threshold):
+    assert translate_threshold(img, threshold) == reference(img, threshold)
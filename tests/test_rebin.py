@@ -0,0 +1,104 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+
+from ehtplot.helpers       import rebin
+from ehtplot.extra.metroize import metroize, metroize_many
+
+
+def ring(shape):
+    y, x = np.indices(shape)
+    r    = np.hypot(x - shape[1] / 2, y - shape[0] / 2)
+    return np.exp(-(r - min(shape) / 4)**2 / 8)
+
+
+@pytest.mark.parametrize('shape', [(100, 100), (100, 64), (64, 64)])
+@pytest.mark.parametrize('reduce', ['mean', 'sum', 'max'])
+def test_rebin_contiguous(shape, reduce):
+    img = np.random.default_rng(0).random(shape)
+    out = rebin(img, (32, 32), reduce)
+    assert out.shape == (32, 32)
+    assert out.flags['C_CONTIGUOUS']
+
+
+def test_rebin_conserves_sum():
+    img = np.random.default_rng(0).random((3, 100, 77))
+    out = rebin(img, (32, 20), 'sum')
+    assert np.allclose(out.sum(axis=(-1, -2)), img.sum(axis=(-1, -2)))
+
+
+def test_rebin_out():
+    img = np.random.default_rng(0).random((100, 64))
+    buf = np.empty((32, 32))
+    assert rebin(img, (32, 32), out=buf) is buf
+    assert np.allclose(buf, rebin(img, (32, 32)))
+
+
+@pytest.mark.parametrize('shape', [(100, 100), (100, 64), (64, 64)])
+@pytest.mark.parametrize('reduce', ['mean', 'sum', 'max'])
+def test_rebin_out_view(shape, reduce):
+    img = np.random.default_rng(0).random((3,) + shape)
+    big = np.zeros((3, 40, 80))
+    buf = big[:, 4:36, ::2][..., 4:36] # not contiguous
+    assert rebin(img, (32, 32), reduce, out=buf) is buf
+    assert np.allclose(buf, rebin(img, (32, 32), reduce))
+    assert big[:, :4].sum() == 0
+
+
+@pytest.mark.parametrize('shape', [(100, 100), (100, 64), (64, 64)])
+@pytest.mark.parametrize('reduce', ['mean', 'sum', 'max'])
+def test_rebin_dtype(shape, reduce):
+    img = np.random.default_rng(0).random(shape)
+    ref = rebin(img, (32, 32), reduce)
+    for dtype in (np.float32, np.float16):
+        out = rebin(img.astype(dtype), (32, 32), reduce)
+        assert out.dtype == dtype
+        assert np.allclose(out, ref, rtol=np.finfo(dtype).resolution * 50)
+
+    ints = (img * 100).astype(np.int32)
+    out  = rebin(ints, (32, 32), reduce)
+    if reduce == 'max':
+        assert out.dtype == np.int32
+    elif reduce == 'mean' or shape != (64, 64):
+        assert out.dtype == np.float64
+    assert np.allclose(out, rebin(ints.astype(float), (32, 32), reduce))
+
+    buf = np.empty((32, 32), dtype=np.int64)
+    assert rebin(img * 100, (32, 32), reduce, out=buf) is buf
+    assert np.array_equal(buf, rebin(img * 100, (32, 32), reduce).astype(int))
+
+
+@pytest.mark.parametrize('shape', [(100, 100), (100, 64)])
+def test_metroize_nondivisible(shape):
+    img = ring(shape)
+    m   = metroize(img, mgrid=32)
+    assert m.shape == (32, 32)
+    assert m.any()
+
+    ms = metroize_many([img, img], mgrid=32, processes=1)
+    assert ms.shape == (2, 32, 32)
+    assert (ms[0] == m).all()
+
+
+def test_metroize_many_empty():
+    for imgs in ([], np.zeros((0, 100, 64))):
+        out = metroize_many(imgs, mgrid=32, processes=1)
+        assert out.shape == (0, 32, 32)
+        assert out.dtype == metroize(ring((100, 64))).dtype
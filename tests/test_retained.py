@@ -0,0 +1,109 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from matplotlib.transforms import Bbox
+
+import ehtplot as eht
+from ehtplot.figure import Figure
+
+
+def realized(**kwargs):
+    """A realized 2x2 grid of images, spying on the blitted regions"""
+    imgs = np.random.default_rng(0).random((4, 32, 32))
+    fig  = eht.plot('image', [[imgs[0], imgs[1]], [imgs[2], imgs[3]]],
+                    colorbar=False, **kwargs)
+    r    = fig.realize()
+    r.fig.canvas.draw() # as shown on screen before any redraw
+    blit = r.fig.canvas.blit
+    r.blits = []
+    r.fig.canvas.blit = lambda bbox=None: (r.blits.append(bbox),
+                                           blit(bbox))
+    return fig, r
+
+
+def pixels(fig):
+    return np.array(fig.canvas.buffer_rgba())
+
+
+def area(b):
+    return b.width * b.height
+
+
+def covers(region, b, fig):
+    """Check if `region` covers the part of `b` on the canvas"""
+    b = Bbox.intersection(b, Bbox([[0, 0], fig.canvas.get_width_height()]))
+    return region.contains(*b.min) and region.contains(*b.max)
+
+
+def test_style_initialized():
+    fig = Figure(eht.Panel([]))
+    assert fig._style is None
+    assert pickle.loads(pickle.dumps(fig))._style is None
+
+
+def test_redraw_one_visual():
+    fig, r = realized()
+    cell   = r.root.children[0].children[1]
+    bbox   = cell.ax.get_tightbbox(r.fig.canvas.get_renderer())
+
+    fig.panel.panels[0].panels[1].panels[0].update(
+        np.random.default_rng(1).random((32, 32)))
+    assert fig.redraw() == 1
+    assert len(r.blits) == 1
+
+    # Only the changed cell is damaged and blitted
+    region = r.blits[0]
+    assert covers(region, bbox, r.fig)
+    assert area(region) < 0.5 * area(r.fig.bbox)
+    blitted = pixels(r.fig)
+
+    # The blitted canvas is identical to a full draw
+    r.fig.canvas.draw()
+    assert np.array_equal(blitted, pixels(r.fig))
+    plt.close(r.fig)
+
+
+def test_redraw_nothing():
+    fig, r = realized()
+    before = pixels(r.fig)
+    assert fig.redraw() == 0
+    assert r.blits == []
+    assert np.array_equal(before, pixels(r.fig))
+    plt.close(r.fig)
+
+
+def test_redraw_panel():
+    fig, r = realized(pyplot=False)
+    fig.panel.panels[1].update(inrow=False)
+    assert fig.redraw() == 2
+    region = Bbox.union(r.blits)
+    row    = r.root.children[1]
+    for c in row.children:
+        b = c.ax.get_tightbbox(r.fig.canvas.get_renderer())
+        assert covers(region, b, r.fig)
+
+    blitted = pixels(r.fig)
+    r.fig.canvas.draw()
+    assert np.array_equal(blitted, pixels(r.fig))
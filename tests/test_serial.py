@@ -0,0 +1,60 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+import ehtplot as eht
+
+from ehtplot.serial import dumps, loads
+from ehtplot.store  import ArrayStore
+
+
+def memmap(tmp_path, shape=(128, 128)):
+    np.save(str(tmp_path / "img.npy"),
+            np.random.default_rng(0).random(shape))
+    return np.load(str(tmp_path / "img.npy"), mmap_mode='r')
+
+
+def test_memmap_in_store(tmp_path):
+    img = memmap(tmp_path)
+    fig = eht.plot('image', [img, img])
+    with ArrayStore() as store:
+        data, buffers = dumps(fig, store=store)
+        assert len(store) == 1
+        assert not buffers
+        assert len(data) < img.nbytes // 4
+        back = loads(data, buffers)
+        a, b = [p.panels[0].props[0] for p in back.panel.panels]
+        assert np.array_equal(a, img)
+        assert a is b
+
+
+def test_memmap_out_of_band(tmp_path):
+    img = memmap(tmp_path)
+    data, buffers = dumps(img)
+    assert len(buffers) == 1
+    assert len(data) < img.nbytes // 4
+    assert np.array_equal(loads(data, buffers), img)
+
+
+def test_masked_array_in_band():
+    arr = np.ma.masked_less(np.arange(65536.0), 10)
+    with ArrayStore() as store:
+        back = loads(*dumps(arr, store=store))
+    assert isinstance(back, np.ma.MaskedArray)
+    assert back.mask[:10].all()
@@ -0,0 +1,108 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+import pytest
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import ehtplot as eht
+from ehtplot.stack import QuantileSketch, Stack
+
+
+Q = np.linspace(0, 1, 21)
+
+
+def rank(values, x):
+    """Fraction of `values` not larger than `x`"""
+    return np.searchsorted(np.sort(values), x, side='right') / values.size
+
+
+@pytest.mark.parametrize('dist', ['uniform', 'lognormal', 'ties'])
+def test_sketch_rank_error(dist):
+    rng = np.random.RandomState(1)
+    if dist == 'uniform':
+        values = rng.rand(1 << 20)
+    elif dist == 'lognormal':
+        values = rng.lognormal(0, 3, 1 << 20)
+    else:
+        values = rng.randint(0, 50, 1 << 20).astype(float)
+
+    sketch = QuantileSketch(k=1024)
+    for chunk in np.array_split(values, 97):
+        sketch.update(chunk)
+    assert sketch.n == values.size
+    assert sum(l.size for l in sketch.levels) < 16 * 1024
+
+    est = sketch.quantile(Q)
+    ref = np.percentile(values, 100 * Q)
+    assert ref[0] <= est[0] and est[-1] <= ref[-1] # samples of the input
+    # The rank error of a KLL sketch is about log2(n/k) / k
+    lo = rank(values, np.nextafter(est, -np.inf))
+    hi = rank(values, est)
+    err = np.maximum(lo - Q, Q - hi).clip(0)
+    assert np.max(err) < 0.01
+
+
+def test_sketch_exact_when_small():
+    values = np.random.RandomState(2).rand(1000)
+    sketch = QuantileSketch(k=4096).update(values)
+    idx    = np.ceil(Q * values.size).astype(int) - 1
+    assert np.array_equal(sketch.quantile(Q),
+                          np.sort(values)[np.clip(idx, 0, None)])
+
+
+def test_stack_percentiles():
+    movie = np.random.RandomState(3).lognormal(0, 1, (32, 64, 64))
+    stack = Stack(movie, frames=[0, 5], percentiles=(1, 99))
+    ref   = np.percentile(movie, [1, 50, 99])
+    assert np.allclose(stack.percentile([1, 50, 99]), ref, rtol=0.05)
+
+    kw = stack.kwargs()
+    assert np.allclose(kw['vlim'], ref[[0, 2]] / movie.max(), rtol=0.05)
+    assert np.allclose(kw['norm'],
+                       movie[[0, 5]].max(axis=(1, 2)) / movie.max())
+
+    it = Stack(iter(movie), frames=[0, 5], percentiles=(1, 99))
+    assert it.kwargs() == kw
+
+
+def test_stack_log_clamps_to_positive():
+    movie = np.random.RandomState(4).randn(8, 16, 16)
+    for p in [None, (1, 99)]:
+        kw = Stack(movie, percentiles=p).kwargs(scale='log')
+        lo = np.min(movie[movie > 0]) / movie.max()
+        assert kw['vlim'][0] >= lo
+        assert kw['vlim'][1] >= kw['vlim'][0]
+
+
+def test_stack_zero_frames():
+    movie    = np.random.RandomState(5).rand(4, 16, 16)
+    movie[1] = 0
+    kw = Stack(movie).kwargs()
+    assert kw['norm'][1] is False
+    assert np.all(np.isfinite(kw['norm'][::2]))
+    fig = eht.plot('image', Stack(movie), colorbar=False).draw()
+    fig.canvas.draw()
+    plt.close(fig)
+
+    kw = Stack(np.zeros((2, 8, 8))).kwargs(scale='log')
+    assert kw == {'vlim': (1, 1)}
+    kw = Stack(np.zeros((2, 8, 8))).kwargs()
+    assert kw == {'vlim': (0, 0)}
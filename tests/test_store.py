@@ -0,0 +1,73 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import gc
+import sys
+import subprocess
+
+import numpy as np
+import pytest
+
+from ehtplot import store
+from ehtplot.store import ArrayStore, attach
+
+
+@pytest.mark.parametrize('kind', ['file', 'shm'])
+def test_attach_is_cached_while_in_use(kind):
+    arr = np.random.default_rng(0).random((64, 64))
+    with ArrayStore(kind) as s:
+        h = s.put(arr)
+        a = attach(h)
+        assert attach(h) is a
+        assert np.array_equal(a, arr)
+        assert a.flags.writeable == (kind == 'file')
+
+        v = a[::2]
+        del a
+        gc.collect()
+        assert h.name in store._attached # the view keeps the mapping
+        del v
+        gc.collect()
+        assert h.name not in store._attached
+        assert np.array_equal(attach(h), arr)
+
+
+def test_attach_is_bounded():
+    with ArrayStore('shm') as s:
+        handles = [s.put(np.full(1024, i)) for i in range(32)]
+        for h in handles:
+            assert attach(h)[0] == handles.index(h)
+        gc.collect()
+        attach(handles[0])
+        assert len(store._attached) <= 1
+        assert not store._released
+
+
+def test_shm_survives_other_processes():
+    code = ("import sys, numpy as np\n"
+            "from ehtplot.store import Handle, attach\n"
+            "h = Handle(*eval(sys.argv[1]))\n"
+            "assert attach(h).sum() == 1024\n")
+    with ArrayStore('shm') as s:
+        h = s.put(np.ones(1024))
+        out = subprocess.run([sys.executable, '-c', code, repr(tuple(h))],
+                             capture_output=True, text=True)
+        assert out.returncode == 0, out.stderr
+        assert "leaked" not in out.stderr
+        gc.collect()
+        assert attach(h).sum() == 1024 # not unlinked by the other process
@@ -0,0 +1,98 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import ehtplot as eht
+from ehtplot.trace import Tracer, span
+
+
+def test_trace_save(tmp_path):
+    imgs = np.random.default_rng(0).random((2, 32, 32))
+    fig  = eht.plot('image', [imgs[0], imgs[1]], pyplot=False)
+    with Tracer() as t:
+        fig.save(str(tmp_path / "trace.png"))
+
+    # Per name: one save, one figure, and every visual and section
+    names = t.stats()
+    assert names['Figure.save']['calls'] == 1
+    assert names['Figure']['calls'] == 1
+    assert names['visualize_image']['calls'] == 2
+    assert names['imshow']['calls'] == 2
+    assert all(s['time'] >= 0 and s['bytes'] == 0 for s in names.values())
+    assert (names['Figure.save']['time'] >=
+            names['Figure']['time'] >=
+            names['visualize_image']['time'])
+
+    # Per node: every node of the tree once, under the Figure's path
+    nodes = t.stats(by='node')
+    assert all(s['calls'] == 1 for s in nodes.values())
+    paths = dict((k.split(' [')[0], []) for k in nodes)
+    for k in nodes:
+        name, path = k[:-1].split(' [')
+        paths[name].append(path.split('/'))
+    root, = paths['Figure']
+    assert len(paths['visualize_image']) == 2
+    for p in paths['visualize_image'] + paths['Panel']:
+        assert p[:len(root)] == root and len(p) > len(root)
+    for p in paths['visualize_image']: # every visual is drawn by a Panel
+        assert any(q == p[:len(q)] for q in paths['Panel'])
+    assert "visualize_image" in t.summary()
+
+    # Chrome trace events: complete events with the required fields
+    t.save(str(tmp_path / "trace.json"))
+    with open(str(tmp_path / "trace.json")) as f:
+        trace = json.load(f)
+    events = trace['traceEvents']
+    assert len(events) == len(t.events)
+    for e in events:
+        assert isinstance(e['name'], str)
+        assert e['ph'] == 'X'
+        assert isinstance(e['ts'], float) and e['ts'] >= 0
+        assert isinstance(e['dur'], float) and e['dur'] >= 0
+        assert e['pid'] == os.getpid()
+        assert e['tid'] == threading.main_thread().ident
+
+    # Every event lies within the save
+    save, = [e for e in events if e['name'] == 'Figure.save']
+    for e in events:
+        assert save['ts'] <= e['ts']
+        assert e['ts'] + e['dur'] <= save['ts'] + save['dur'] + 1e-3
+
+
+def test_trace_memory():
+    with Tracer(memory=True) as t:
+        with span('alloc'):
+            buf = np.ones(1 << 20)
+    assert t.stats()['alloc']['bytes'] >= buf.nbytes
+
+
+def test_one_tracer():
+    with Tracer():
+        with pytest.raises(RuntimeError):
+            with Tracer():
+                pass
+    with Tracer() as t: # the first one was released
+        with span('x'):
+            pass
+    assert t.stats()['x']['calls'] == 1
@@ -0,0 +1,73 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ehtplot.extra.tracks     import tracks
+from ehtplot.extra.visibility import Plan, Sampler, visibility
+
+
+def reference(img, pad):
+    n, m = img.shape
+    buf  = np.zeros((pad * n, pad * m))
+    buf[:n, :m] = img
+    buf = np.roll(buf, (-(n // 2), -(m // 2)), axis=(0, 1))
+    return np.fft.fftshift(np.fft.fft2(buf))
+
+
+def test_visibility_matches_fft():
+    imgs = np.random.default_rng(0).random((5, 12, 10))
+    v    = visibility(imgs, pad=4, batch=2)
+    for img, vis in zip(imgs, v):
+        assert np.allclose(vis, reference(img, 4))
+    assert np.allclose(visibility(imgs[0], pad=4), reference(imgs[0], 4))
+
+
+def test_buffer_sized_to_images():
+    p = Plan((16, 16), pad=8, batch=16)
+    p.half(np.ones((1, 16, 16)))
+    assert [b.shape for b in p._free] == [(1, 128, 128)]
+    p.half(np.ones((3, 16, 16)))
+    assert max(len(b) for b in p._free) == 3
+
+
+def test_buffers_bounded():
+    p    = Plan((16, 16), pad=4, batch=4)
+    imgs = np.random.default_rng(0).random((4, 16, 16))
+    with ThreadPoolExecutor(8) as ex:
+        out = list(ex.map(lambda i: p.half(imgs), range(64)))
+    assert len(p._free) <= Plan.keep
+    for o in out:
+        assert np.array_equal(o, out[0])
+
+
+def test_sampler_nufft_matches_dft():
+    U, V  = tracks()
+    u, v  = np.asarray(U[::50]), np.asarray(V[::50])
+    psize = 0.4 / max(np.max(np.abs(u)), np.max(np.abs(v)))
+    imgs  = np.random.default_rng(0).random((3, 48, 40))
+
+    dft   = Sampler(u, v, (48, 40), psize, method='dft')(imgs)
+    nufft = Sampler(u, v, (48, 40), psize, method='nufft')(imgs)
+    assert dft.shape == nufft.shape == (3, u.size)
+    assert np.max(np.abs(nufft - dft)) < 1e-6 * np.max(np.abs(dft))
+
+    single = Sampler(u, v, (48, 40), psize, method='nufft')(imgs[1])
+    assert np.allclose(single, nufft[1])
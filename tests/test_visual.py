@@ -0,0 +1,59 @@
+# Copyright (C) 2019 Lia Medeiros & Chi-kwan Chan
+# Copyright (C) 2019 Steward Observatory
+#
+# This file is part of ehtplot.
+#
+# ehtplot is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ehtplot is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ehtplot.  If not, see <http://www.gnu.org/licenses/>.
+
+from ehtplot import visual
+from ehtplot.visual import Visual
+
+
+def f(ax, img, name=None):
+    pass
+
+
+def g(ax, *args, **kwargs):
+    pass
+
+
+class Unhashable(object):
+    __hash__ = None
+
+    def __call__(self, ax, img, colorbar=True):
+        pass
+
+
+def test_accepts():
+    assert Visual._accepts(f, 'name')
+    assert not Visual._accepts(f, 'colorbar')
+    assert Visual._accepts(g, 'colorbar')
+    assert Visual._accepts(Unhashable(), 'colorbar')
+    assert not Visual._accepts(Unhashable(), 'name')
+
+
+def test_accepts_is_cached(monkeypatch):
+    calls = []
+
+    def signature(func):
+        calls.append(func)
+        return sig(func)
+
+    sig = visual.signature
+    visual._keywords.cache_clear()
+    monkeypatch.setattr(visual, 'signature', signature)
+    for _ in range(100):
+        Visual._accepts(f, 'name')
+        Visual._accepts(f, 'colorbar')
+    assert calls == [f]